@@ -5,14 +5,17 @@ setup(
     version='0.1',
     packages=find_packages(),
     install_requires=[
-        'loguru',
+        'loguru>=0.7,<0.8',  # new_pipeline() builds a Logger the way loguru 0.7 does
         'typer',
         'ttkbootstrap',
         'tkfontawesome',
     ],
+    extras_require={
+        'numpy': ['numpy'],  # Faster table-mode sorting and range filters in the log viewer
+    },
     entry_points={
         'console_scripts': [
-            'unifiedlogger = unifiedlogger:main',  # Adjust as needed
+            'unifiedlogger = unified_logger.cli:main',
         ],
     },
 )
@@ -0,0 +1,100 @@
+import asyncio
+import contextvars
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from unified_logger.unified_logger import UnifiedLogger
+from unified_logger.async_capture import TASK_CHAIN_SUPPORTED, chained_task_factory, task_chain
+
+
+request_id = contextvars.ContextVar("request_id")
+
+
+class TestAsyncCapture(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder, ignore_errors=True)
+        self.logger = UnifiedLogger(interfaces="cli", log_folder=folder)
+
+    def logged_message(self, mock_logger):
+        return mock_logger.bind.return_value.error.call_args[0][0]
+
+    @unittest.skipUnless(TASK_CHAIN_SUPPORTED, "task chains need Python 3.11")
+    def test_task_chain_and_contextvars(self):
+        async def failing():
+            try:
+                raise ValueError("in task")
+            except ValueError as e:
+                self.logger.log_exception(e)
+
+        async def handler():
+            request_id.set("req-42")
+            await asyncio.create_task(failing(), name="worker")
+
+        async def main():
+            self.logger.install_asyncio_handler()
+            await asyncio.create_task(handler(), name="request")
+
+        with patch.object(self.logger, 'logger') as mock_logger:
+            asyncio.run(main())
+            message = self.logged_message(mock_logger)
+            self.assertIn(" > request > worker", message)  # Below the asyncio.run() main task
+            self.assertIn("Awaiting: ", message)
+            self.assertIn("'request_id': 'req-42'", message)
+            task_info = mock_logger.bind.call_args.kwargs["task"]
+            self.assertEqual(task_info["chain"][-1], "request")
+
+    @unittest.skipUnless(TASK_CHAIN_SUPPORTED, "task chains need Python 3.11")
+    def test_explicit_context_is_copied(self):
+        async def child():
+            return task_chain.get(), request_id.get(None)
+
+        async def parent():
+            request_id.set("outer")
+            _, empty = await asyncio.create_task(child(), context=contextvars.Context())  # Empty, so falsy
+            given = contextvars.Context()
+            given.run(request_id.set, "req-7")
+            chain, seen = await asyncio.create_task(child(), context=given)
+            return chain, seen, given.run(task_chain.get), empty
+
+        async def main():
+            asyncio.get_running_loop().set_task_factory(chained_task_factory)
+            return await asyncio.create_task(parent(), name="parent")
+
+        chain, seen, callers, empty = asyncio.run(main())
+        self.assertIsNone(empty)
+        self.assertEqual(chain[-1], "parent")
+        self.assertEqual(seen, "req-7")  # The caller's context, not a fresh copy of the current one
+        self.assertEqual(callers, ())  # The chain went on a copy
+
+    def test_loop_handler_logs_unhandled_task_errors(self):
+        async def failing():
+            payload = "local value"
+            raise KeyError(payload)
+
+        async def main():
+            self.logger.install_asyncio_handler()
+            task = asyncio.create_task(failing(), name="orphan")
+            await asyncio.sleep(0)
+            e = task.exception()
+            asyncio.get_running_loop().call_exception_handler({"message": "Task exception was never retrieved", "exception": e, "future": task})
+
+        with patch.object(self.logger, 'logger') as mock_logger:
+            asyncio.run(main())
+            message = self.logged_message(mock_logger)
+            self.assertIn("'payload': 'local value'", message)
+            self.assertIn("Task: orphan", message)
+
+    def test_outside_asyncio_has_no_task(self):
+        with patch.object(self.logger, 'logger') as mock_logger:
+            try:
+                raise ValueError("sync")
+            except ValueError as e:
+                self.logger.log_exception(e)
+            self.assertIsNone(mock_logger.bind.call_args.kwargs["task"])
+
+
+if __name__ == '__main__':
+    unittest.main()
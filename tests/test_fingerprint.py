@@ -0,0 +1,65 @@
+import unittest
+from unified_logger.fingerprint import fingerprint, ExceptionAggregator, CircuitBreaker
+
+
+def fail(value):
+    raise ValueError(f"bad value {value}")
+
+
+def catch(func, *args):
+    try:
+        func(*args)
+    except Exception as e:
+        return e
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_same_site_same_fingerprint(self):
+        # The message is not part of the fingerprint, only the type and the frames
+        self.assertEqual(fingerprint(catch(fail, 1)), fingerprint(catch(fail, 2)))
+
+    def test_different_site_different_fingerprint(self):
+        other = catch(lambda: fail(1))
+        self.assertNotEqual(fingerprint(catch(fail, 1)), fingerprint(other))
+
+    def test_full_limit_within_window(self):
+        aggregator = ExceptionAggregator(full_limit=2, window=10)
+        decisions = [aggregator.record(catch(fail, i), now=i)[2] for i in range(4)]
+        self.assertEqual(decisions, [True, True, False, False])
+        self.assertTrue(aggregator.record(catch(fail, 0), now=20)[2])  # New window
+        group = next(iter(aggregator.summary().values()))
+        self.assertEqual((group["count"], group["first_seen"], group["last_seen"]), (5, 0, 20))
+
+    def test_same_exception_counted_once(self):
+        aggregator = ExceptionAggregator()
+        e = catch(fail, 1)
+        self.assertEqual(aggregator.record(e), aggregator.record(e))
+        self.assertEqual(next(iter(aggregator.summary().values()))["count"], 1)
+
+    def test_decisions_are_per_instance(self):
+        strict, lenient = ExceptionAggregator(full_limit=0), ExceptionAggregator()
+        e = catch(fail, 1)
+        self.assertFalse(strict.record(e)[2])
+        self.assertTrue(lenient.record(e)[2])
+        self.assertEqual(len(lenient.summary()), 1)
+        tripped, calm = CircuitBreaker(threshold=0), CircuitBreaker()
+        self.assertTrue(tripped.record(e, "fp"))
+        self.assertFalse(calm.record(e, "fp"))
+        self.assertFalse(calm.degraded)
+
+    def test_circuit_breaker_trips_and_recovers(self):
+        breaker = CircuitBreaker(threshold=2, window=5, recovery_ratio=0.5)
+        states = [breaker.record(catch(fail, i), "fp", now=100 + i * 0.1) for i in range(12)]
+        self.assertEqual(states, [False] * 10 + [True] * 2)  # 11 in 5s is above 2/s
+        summary, _, degraded = breaker.take_summary(now=102)
+        self.assertEqual(summary["fp"][0], 2)
+        self.assertTrue(degraded)
+        summary, _, degraded = breaker.take_summary(now=110)  # Window has emptied
+        self.assertEqual(summary, {})
+        self.assertFalse(degraded)
+        self.assertFalse(breaker.record(catch(fail, 0), "fp", now=110))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import traceback
+import unittest
+import json
+from unified_logger.frames import ExceptionSnapshot, FrameCache, capped_payload
+from unified_logger.safe_repr import SafeRepr
+
+
+def inner():
+    raise KeyError("missing")
+
+
+def outer():
+    token = 42
+    try:
+        inner()
+    except KeyError as e:
+        raise ValueError("wrapped") from e
+
+
+class TestFrames(unittest.TestCase):
+
+    def capture(self, **kwargs):
+        try:
+            outer()
+        except ValueError as e:
+            return e, ExceptionSnapshot.capture(e, **kwargs)
+
+    def test_render_matches_traceback_module(self):
+        e, snapshot = self.capture()
+        expected = "".join(traceback.format_exception(type(e), e, e.__traceback__))
+        # format_exception may add caret lines (^^^^) that the snapshot renderer leaves out
+        lines = [line for line in expected.splitlines() if not line.strip() or line.strip().strip("^~")]
+        self.assertEqual(snapshot.render(), "\n".join(lines))
+
+    def test_snapshot_holds_no_frames(self):
+        _, snapshot = self.capture()
+        self.assertEqual([frame.code.co_name for frame in snapshot.frames], ["capture", "outer"])
+        self.assertEqual([frame.code.co_name for frame in snapshot.cause.frames], ["outer", "inner"])
+
+    def test_frame_locals(self):
+        _, snapshot = self.capture(safe_repr=SafeRepr())
+        self.assertEqual(snapshot.frames[1].locals, "{'token': 42}")
+        self.assertIn("Locals:", snapshot.render())
+
+    def test_frame_cache_hits(self):
+        cache = FrameCache()
+        _, snapshot = self.capture()
+        frame = snapshot.frames[1]
+        first = cache.render(frame.code, frame.lineno)
+        self.assertEqual(cache.render(frame.code, frame.lineno), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_frame_cache_eviction(self):
+        cache = FrameCache(max_entries=2)
+        _, snapshot = self.capture()
+        for frame in snapshot.frames + snapshot.cause.frames:
+            cache.render(frame.code, frame.lineno)
+        self.assertEqual(len(cache.entries), 2)
+
+    def test_frame_cache_invalidated_on_source_change(self):
+        cache = FrameCache(check_interval=0)
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "module.py")
+            with open(path, "w") as source:
+                source.write("value = 1\n")
+            code = compile("value = 1\n", path, "exec")
+            self.assertIn("value = 1", cache.render(code, 1))
+            with open(path, "w") as source:
+                source.write("value = 2\n")
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+            self.assertIn("value = 2", cache.render(code, 1))
+
+    def test_to_dict(self):
+        _, snapshot = self.capture(safe_repr=SafeRepr())
+        payload = snapshot.to_dict()
+        self.assertEqual((payload["type"], payload["message"]), ("ValueError", "wrapped"))
+        self.assertEqual(payload["frames"][1]["source"], 'raise ValueError("wrapped") from e')
+        self.assertEqual(payload["frames"][1]["locals"], "{'token': 42}")
+        self.assertEqual(payload["cause"]["type"], "KeyError")
+
+    def test_capped_payload(self):
+        def recurse(depth):
+            if depth == 0:
+                raise ValueError("x" * 5000)
+            recurse(depth - 1)
+        try:
+            recurse(50)
+        except ValueError as e:
+            snapshot = ExceptionSnapshot.capture(e, safe_repr=SafeRepr())
+        for budget in (100000, 4000, 1000, 200):
+            self.assertLessEqual(len(json.dumps(capped_payload(snapshot, budget))), budget)
+        payload = capped_payload(snapshot, 4000)
+        self.assertNotIn("locals", payload["frames"][0])
+        self.assertEqual(payload["frames"][-1]["function"], "recurse")
+        self.assertGreater(payload["frames_omitted"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
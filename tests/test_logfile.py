@@ -0,0 +1,113 @@
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from unified_logger.logfile import LogFileIndex, LogFileStore, STRIDE, remove_temp_files, temp_files
+
+
+class TestLogFileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.lines = [f"2026-01-01T00:00:{i % 60:02d}.000000+0000 [{'ERROR' if i % 5 == 0 else 'INFO'}] line {i}"
+                      for i in range(STRIDE * 10 + 7)]
+        self.path = os.path.join(self.folder.name, "app.log")
+        with open(self.path, "w", encoding="utf-8") as log_file:
+            log_file.write("\n".join(self.lines) + "\n")
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_lines_after_build(self):
+        index = LogFileIndex(self.path)
+        index.build()
+        self.assertTrue(index.done)
+        self.assertEqual(index.line_count(), len(self.lines))
+        self.assertEqual(len(index.starts), len(self.lines) // STRIDE + 1)
+        for number in (0, 1, STRIDE - 1, STRIDE, STRIDE * 3 + 5, len(self.lines) - 1):
+            self.assertEqual(index.line(number), self.lines[number])
+        index.close()
+
+    def test_estimates_before_build(self):
+        index = LogFileIndex(self.path)
+        self.assertFalse(index.done)
+        self.assertAlmostEqual(index.line_count(), len(self.lines), delta=len(self.lines) * 0.1)
+        self.assertEqual(index.line(0), self.lines[0])
+        self.assertIn(index.line(300), self.lines)  # Some nearby whole line
+        index.close()
+
+    def test_compressed_sibling(self):
+        gz_path = self.path + ".gz"
+        with open(self.path, "rb") as source, gzip.open(gz_path, "wb") as target:
+            target.write(source.read())
+        index = LogFileIndex(gz_path)
+        self.assertIsNone(index.temp_path)  # Decompressing is left to the build thread
+        self.assertEqual(index.line_count(), 0)
+        self.assertTrue(index.progress().startswith("unpacking"))
+        index.build()
+        self.assertEqual(index.progress(), "")
+        self.assertGreater(index.unpacked, 0)
+        self.assertEqual(index.line(42), self.lines[42])
+        temp_path = index.temp_path
+        self.assertIn(temp_path, temp_files)
+        index.close()
+        self.assertFalse(os.path.exists(temp_path))
+        self.assertNotIn(temp_path, temp_files)
+
+    def test_unclosed_copies_removed_at_exit(self):
+        gz_path = self.path + ".gz"
+        with open(self.path, "rb") as source, gzip.open(gz_path, "wb") as target:
+            target.write(source.read())
+        closed = LogFileIndex(gz_path)
+        closed.close()
+        closed.build()  # Closed first: nothing is unpacked
+        self.assertIsNone(closed.temp_path)
+        index = LogFileIndex(gz_path)
+        index.build()
+        remove_temp_files()  # Registered with atexit
+        self.assertFalse(os.path.exists(index.temp_path))
+        index.close()
+
+    def test_store_parses_levels(self):
+        index = LogFileIndex(self.path)
+        index.build()
+        store = LogFileStore(index)
+        self.assertEqual(len(store), len(self.lines))
+        self.assertEqual(store.level(5), "ERROR")
+        self.assertEqual(store.level(6), "INFO")
+        self.assertEqual(store.text(6), self.lines[6])
+        index.close()
+
+    def test_store_shared_with_search_thread(self):
+        index = LogFileIndex(self.path)
+        index.build()
+        store = LogFileStore(index)
+        errors = []
+
+        def read(rows):
+            try:
+                for _ in range(20000):
+                    for row in rows:
+                        store.row(row)
+            except Exception as e:
+                errors.append(e)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)  # Switch threads in the middle of cache updates
+        self.addCleanup(sys.setswitchinterval, interval)
+        with patch("unified_logger.logfile.MAX_CACHED_LINES", 4):  # Constant eviction
+            threads = [threading.Thread(target=read, args=(rows,)) for rows in ([0, 1, 2], [2, 3, 4, 5])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(store.text(6), self.lines[6])
+        index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
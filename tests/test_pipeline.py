@@ -0,0 +1,157 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unified_logger.pipeline import new_pipeline, QueuedSink
+from unified_logger.frames import ExceptionSnapshot
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+class GatedSink:
+    # Sink that holds the worker until the test opens the gate
+    def __init__(self):
+        self.gate = threading.Event()
+        self.received = []
+
+    def __call__(self, message):
+        self.gate.wait()
+        self.received.append(message)
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_new_pipeline_is_isolated(self):
+        first, second = new_pipeline(), new_pipeline()
+        received = []
+        first.add(received.append, format="{message}")
+        second.info("not for first")
+        first.info("for first")
+        self.assertEqual(received, ["for first\n"])
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            QueuedSink(print, policy="explode")
+
+    def fill(self, queued, sink, count):
+        queued("first")
+        self.assertTrue(wait_for(lambda: queued.stats()["queued"] == 0))  # Worker holds "first" at the gate
+        for i in range(count):
+            queued(f"msg-{i}")
+
+    def test_drop_newest(self):
+        sink = GatedSink()
+        queued = QueuedSink(sink, max_queue=2, policy="drop_newest")
+        self.fill(queued, sink, 4)
+        sink.gate.set()
+        self.assertTrue(wait_for(lambda: len(sink.received) == 3))
+        self.assertEqual(sink.received, ["first", "msg-0", "msg-1"])
+        stats = queued.stats()
+        self.assertEqual(stats["dropped"], 2)
+        self.assertEqual(stats["high_watermark"], 2)
+
+    def test_drop_oldest(self):
+        sink = GatedSink()
+        queued = QueuedSink(sink, max_queue=2, policy="drop_oldest")
+        self.fill(queued, sink, 4)
+        sink.gate.set()
+        self.assertTrue(wait_for(lambda: len(sink.received) == 3))
+        self.assertEqual(sink.received, ["first", "msg-2", "msg-3"])
+        self.assertEqual(queued.stats()["dropped"], 2)
+
+    def test_block(self):
+        sink = GatedSink()
+        queued = QueuedSink(sink, max_queue=1, policy="block")
+        self.fill(queued, sink, 1)
+        producer = threading.Thread(target=queued, args=("blocked",))
+        producer.start()
+        producer.join(0.1)
+        self.assertTrue(producer.is_alive())
+        sink.gate.set()
+        producer.join(2)
+        self.assertTrue(wait_for(lambda: len(sink.received) == 3))
+        self.assertEqual(queued.stats()["dropped"], 0)
+
+    def test_spill_replays_records(self):
+        sink = GatedSink()
+        with tempfile.TemporaryDirectory() as folder:
+            spill_path = os.path.join(folder, "spill.jsonl")
+            queued = QueuedSink(sink, max_queue=1, policy="spill", spill_path=spill_path)
+            self.fill(queued, sink, 3)
+            self.assertEqual(queued.stats()["spilled"], 2)
+            sink.gate.set()
+            queued("msg-3")
+            sink.gate.set()
+            self.assertTrue(wait_for(lambda: len(sink.received) == 5))
+            self.assertEqual(sink.received, ["first", "msg-0", "msg-1", "msg-2", "msg-3"])
+
+    def test_spilled_records_keep_fields_and_tracebacks(self):
+        sink = GatedSink()
+        with tempfile.TemporaryDirectory() as folder:
+            queued = QueuedSink(sink, max_queue=1, policy="spill", spill_path=os.path.join(folder, "spill.jsonl"))
+            logger = new_pipeline()
+            logger.add(queued, format="{message}")
+            logger.info("first")
+            self.assertTrue(wait_for(lambda: queued.stats()["queued"] == 0))
+            logger.info("queued")
+            try:
+                raise ValueError("spilled")
+            except ValueError as e:
+                logger.bind(traceback=ExceptionSnapshot.capture(e)).error("Custom Traceback [abc]:")
+            self.assertEqual(queued.stats()["spilled"], 1)
+            sink.gate.set()
+            self.assertTrue(wait_for(lambda: len(sink.received) == 3))
+            spilled = sink.received[2]
+            self.assertIn("ValueError: spilled", spilled)
+            self.assertEqual(spilled.record["message"], "Custom Traceback [abc]:")
+            self.assertEqual(spilled.record["level"].name, "ERROR")
+            self.assertIn("ValueError: spilled", spilled.record["extra"]["traceback"])
+            self.assertGreater(spilled.record["time"].timestamp(), 0)
+
+    def test_close_drains_queue(self):
+        received = []
+        queued = QueuedSink(received.append, max_queue=100)
+        for i in range(50):
+            queued(f"msg-{i}")
+        self.assertEqual(queued.close(timeout=2), 0)
+        self.assertEqual(len(received), 50)
+        queued("after close")
+        self.assertEqual(queued.stats()["dropped"], 1)
+
+    def test_close_reports_unflushed_at_deadline(self):
+        sink = GatedSink()
+        queued = QueuedSink(sink, max_queue=100)
+        self.fill(queued, sink, 3)
+        started = time.monotonic()
+        self.assertEqual(queued.close(timeout=0.1), 4)
+        self.assertLess(time.monotonic() - started, 1)
+        sink.gate.set()
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_fork_child_gets_working_sink(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "out.log")
+            queued = QueuedSink(path, per_child_files=True)
+            queued("parent before fork\n")
+            pid = os.fork()
+            if pid == 0:
+                queued("child\n")
+                os._exit(0 if queued.close(timeout=2) == 0 else 1)
+            _, status = os.waitpid(pid, 0)
+            queued("parent after fork\n")
+            queued.close(timeout=2)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            with open(path) as parent_file:
+                self.assertEqual(parent_file.read(), "parent before fork\nparent after fork\n")
+            with open(os.path.join(folder, f"out-{pid}.log")) as child_file:
+                self.assertEqual(child_file.read(), "child\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
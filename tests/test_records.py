@@ -0,0 +1,144 @@
+import tempfile
+import unittest
+from unified_logger.records import RecordStore, FacetView, MAX_ROW_CHARS, NOT_LOADED
+from unified_logger.unified_logger import UnifiedLogger
+from unified_logger.viewer import IngestQueue
+
+
+class TestRecordStore(unittest.TestCase):
+
+    def test_append_interns_levels(self):
+        store = RecordStore()
+        store.append(1.0, "INFO", "first")
+        store.append(2.0, "ERROR", "second")
+        row = store.append(3.0, "INFO", "third")
+        self.assertEqual(row, 2)
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.level_names, ["INFO", "ERROR"])
+        self.assertEqual(list(store.levels), [0, 1, 0])
+        self.assertEqual(store.level(1), "ERROR")
+
+    def test_row_text_is_one_clipped_line(self):
+        store = RecordStore()
+        store.append(0.0, "ERROR", "boom\nTraceback (most recent call last):")
+        store.append(0.0, "INFO", "x" * (MAX_ROW_CHARS * 2))
+        self.assertTrue(store.row_text(0).endswith("boom …"))
+        self.assertNotIn("\n", store.row_text(0))
+        self.assertIn("Traceback", store.text(0))
+        self.assertEqual(len(store.row_text(1)), MAX_ROW_CHARS + 2)
+
+    def test_ring_keeps_newest_messages(self):
+        store = RecordStore(capacity=3)
+        for i in range(5):
+            store.append(float(i), "INFO", f"message {i}")
+        self.assertEqual(len(store), 5)
+        self.assertEqual(len(store.messages), 3)
+        self.assertEqual([store.message(row) for row in (2, 3, 4)], ["message 2", "message 3", "message 4"])
+        self.assertEqual(store.message(0), NOT_LOADED)  # No log file to read it back from
+
+    def test_evicted_messages_reload_from_log_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            log = UnifiedLogger(interfaces="cli", log_folder=folder, log_level="INFO")
+            log.viewer_queue = IngestQueue()
+            log.viewer_queue.set_budget(1, 1000)
+            log.logger.add(log.update_log_viewer, level="DEBUG")
+            for i in range(40):
+                log.display(f"message {i}\nsecond line {i}")
+                log.display(f"hidden {i}", level="debug")  # Below the file level: never written to disk
+            store = RecordStore(capacity=10)
+            for *item, snapshot in log.viewer_queue.take():
+                store.append(*item)
+            log.close()
+            self.assertEqual(len(store), 80)
+            self.assertFalse(store.in_memory(0))
+            self.assertEqual(store.message(0), "message 0\nsecond line 0")
+            self.assertEqual(store.message(1), NOT_LOADED)
+            self.assertEqual(store.message(50), "message 25\nsecond line 25")
+            self.assertEqual(store.message(79), "hidden 39")
+            self.assertEqual(len(store.pages), 1)
+
+    def test_remote_rows_do_not_break_reload(self):
+        with tempfile.TemporaryDirectory() as folder:
+            log = UnifiedLogger(interfaces="cli", log_folder=folder, log_level="INFO")
+            log.viewer_queue.set_budget(1, 1000)
+            log.logger.add(log.update_log_viewer, level="DEBUG")
+            for i in range(8):
+                log.display(f"a{i}")
+            store = RecordStore(capacity=2)
+            for position, (*item, snapshot) in enumerate(log.viewer_queue.take()):
+                store.append(*item)
+                if position == 2:
+                    # A remote source's row: no file offset, and a clock of its own
+                    store.append(item[0] + 3600, "INFO", "remote", stream="worker-1")
+            log.close()
+            live = [row for row in range(len(store)) if store.streams[row] == 0]
+            self.assertEqual([store.message(row) for row in live[:-2]], [f"a{i}" for i in range(6)])
+            self.assertEqual(store.message(3), NOT_LOADED)
+
+    def test_facet_counts_and_views(self):
+        store = RecordStore()
+        store.append(0.0, "INFO", "a", module="app", site="app:run:1")
+        store.append(0.0, "ERROR", "b", module="db", site="db:query:9")
+        store.append(0.0, "ERROR", "c", module="app", site="app:run:2")
+        self.assertEqual(store.facet_counts("level"), [("INFO", 1), ("ERROR", 2)])
+        self.assertEqual(store.facet_counts("module"), [("app", 2), ("db", 1)])
+        errors = FacetView(store, {"level": store.level_id("ERROR")})
+        self.assertEqual(list(errors), [1, 2])
+        app_errors = FacetView(store, {"level": store.level_id("ERROR"), "module": store.intern("module", "app")})
+        self.assertEqual(list(app_errors), [2])
+        for row in (store.append(0.0, "ERROR", "d", module="app"), store.append(0.0, "ERROR", "e", module="db")):
+            errors.add_live(store, row)
+            app_errors.add_live(store, row)
+        self.assertEqual(list(errors), [1, 2, 3, 4])  # Shares the store's growing row list
+        self.assertEqual(list(app_errors), [2, 3])
+
+    def test_streams_share_one_store(self):
+        store = RecordStore()
+        store.append(0.0, "INFO", "local")
+        store.append(0.0, "INFO", "remote", stream="worker-1")
+        store.append(0.0, "ERROR", "local error")
+        self.assertEqual(store.facet_counts("stream"), [("live", 2), ("worker-1", 1)])
+        live = FacetView(store, {"stream": store.intern("stream", "live")})
+        second = FacetView(store, {"stream": store.intern("stream", "live")})
+        self.assertIs(live.rows, second.rows)  # Another tab on the stream copies no rows
+        self.assertEqual(list(live), [0, 2])
+
+    def test_time_buckets(self):
+        store = RecordStore()
+        for timestamp, level in ((100.2, "INFO"), (100.7, "ERROR"), (102.1, "INFO"), (101.9, "INFO"), (105.0, "CRITICAL")):
+            store.append(timestamp, level, "x")
+        self.assertEqual(list(store.seconds), [100, 102, 105])
+        self.assertEqual(list(store.second_rows), [0, 2, 4])
+        self.assertEqual(list(store.total_counts), [2, 4, 5])  # 101.9 arrived late and counts toward 102
+        self.assertEqual(store.density(100, 106, 3), [(2, 1), (2, 0), (1, 1)])
+        self.assertEqual(store.row_at_time(103.5), 2)
+        self.assertEqual(store.row_at_time(99), 0)
+        self.assertEqual(store.row_at_time(200), 4)
+
+    def test_compact_drops_oldest_rows(self):
+        store = RecordStore(capacity=4, max_rows=8)
+        for i in range(9):
+            store.append(100 + i // 2, "ERROR" if i % 3 == 0 else "INFO", f"message {i}", module=f"m{i % 2}",
+                         source=("a.log", 1) if i < 4 else ("b.log", 2))
+        errors = FacetView(store, {"level": store.level_id("ERROR")})
+        both = FacetView(store, {"level": store.level_id("ERROR"), "module": store.intern("module", "m0")})
+        self.assertEqual(store.compact(), 3)  # Down to three quarters of max_rows
+        self.assertEqual(len(store), 6)
+        self.assertEqual(store.dropped, 3)
+        self.assertEqual([store.message(row) for row in range(2, 6)], [f"message {i}" for i in range(5, 9)])
+        self.assertEqual(list(store.postings["level"][store.level_id("ERROR")]), [0, 3])
+        self.assertEqual(store.facet_counts("module"), [("m0", 3), ("m1", 3)])
+        self.assertEqual(errors.drop(store, 3), 1)
+        self.assertEqual(list(errors), [0, 3])
+        self.assertEqual(both.drop(store, 3), 1)
+        self.assertEqual(list(both), [3])  # Row 6, even: module m0
+        self.assertEqual(list(store.seconds), [101, 102, 103, 104])
+        self.assertEqual(list(store.second_rows), [0, 1, 3, 5])
+        self.assertEqual(list(store.total_counts), [1, 3, 5, 6])  # Row 2 of second 101 is gone
+        self.assertEqual(list(store.error_counts), [1, 1, 2, 2])
+        self.assertEqual(store.sources, [[0, "a.log", 1], [1, "b.log", 2]])
+        self.assertEqual(store.compact(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
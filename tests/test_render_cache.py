@@ -0,0 +1,62 @@
+import unittest
+from unified_logger.render_cache import RenderCache
+
+
+class FakeFont:
+
+    def __init__(self):
+        self.calls = 0
+
+    def metrics(self):
+        self.calls += 1
+        return {"linespace": 15}
+
+
+class TestRenderCache(unittest.TestCase):
+
+    def test_images_are_made_once_per_key(self):
+        cache = RenderCache()
+        made = []
+
+        def make(icon, fill, scale_to_height):
+            made.append((icon, fill, scale_to_height))
+            return object()
+
+        first = cache.image("bug", "#fff", 14, make)
+        self.assertIs(cache.image("bug", "#fff", 14, make), first)
+        self.assertIsNot(cache.image("bug", "#000", 14, make), first)
+        self.assertEqual(made, [("bug", "#fff", 14), ("bug", "#000", 14)])
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_images_are_bounded(self):
+        cache = RenderCache(max_images=2)
+        for height in range(5):
+            cache.image("bug", "#fff", height, lambda icon, fill, scale_to_height: object())
+        self.assertEqual(list(cache.images), [("bug", "#fff", 3), ("bug", "#fff", 4)])
+
+    def test_font_metrics_and_wrap_heights(self):
+        cache = RenderCache()
+        font = FakeFont()
+        self.assertEqual(cache.font_metrics("TkDefaultFont", lambda: font)["linespace"], 15)
+        cache.font_metrics("TkDefaultFont", lambda: font)
+        self.assertEqual(font.calls, 1)
+        measured = []
+        measure = lambda: measured.append(1) or 45
+        self.assertEqual(cache.wrap_height("long text", 800, "TkDefaultFont", measure), 45)
+        self.assertEqual(cache.wrap_height("long text", 800, "TkDefaultFont", measure), 45)
+        cache.wrap_height("long text", 400, "TkDefaultFont", measure)
+        self.assertEqual(len(measured), 2)
+
+    def test_invalidate(self):
+        cache = RenderCache()
+        font = FakeFont()
+        cache.font_metrics("TkDefaultFont", lambda: font)
+        cache.wrap_height("text", 800, "TkDefaultFont", lambda: 20)
+        cache.invalidate()
+        cache.font_metrics("TkDefaultFont", lambda: font)
+        self.assertEqual(font.calls, 2)
+        self.assertEqual(len(cache.wraps), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from typer.testing import CliRunner
+from unified_logger.unified_logger import UnifiedLogger
+from unified_logger.fingerprint import fingerprint
+from unified_logger import report
+from unified_logger.cli import app
+
+
+def divide(x, y):
+    return x / y
+
+
+class TestReport(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        log = UnifiedLogger(interfaces="cli", log_folder=self.folder)
+        log.exception_aggregator.full_limit = 2
+        for _ in range(4):
+            try:
+                divide(1, 0)
+            except Exception as e:
+                log.log_exception(e)
+                self.fp = fingerprint(e)
+        log.close()
+        self.log_file = log.log_file
+        # A compressed rotation of the same log
+        with open(log.log_file, "rb") as source, gzip.open(log.log_file + ".1.gz", "wb") as target:
+            target.write(source.read())
+
+    def test_collect_errors(self):
+        groups = report.collect_errors(self.folder, workers=1)
+        self.assertEqual(list(groups), [self.fp])
+        group = groups[self.fp]
+        self.assertEqual(group["count"], 8)  # 2 full traces + 2 repeats, in both files
+        self.assertEqual(group["summary"], "ZeroDivisionError: division by zero")
+        self.assertIn("return x / y", group["sample"])
+
+    def test_both_entries_of_one_exception_count_once(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        log = UnifiedLogger(interfaces="cli", log_folder=folder)
+        log.exception_aggregator.full_limit = 2
+        for _ in range(5):
+            try:
+                divide(1, 0)
+            except Exception as e:
+                log.log_exception(e)
+                log.custom_traceback(e)
+                fp = fingerprint(e)
+        log.close()
+        with open(log.log_file, encoding="utf-8") as log_file:
+            lines = log_file.read().splitlines()
+        with open(log.log_file, "a", encoding="utf-8") as log_file:
+            log_file.write(next(line for line in lines if "repeated (5 total)" in line) + "\n")  # As older versions wrote
+        self.assertEqual(report.scan_file(log.log_file)[fp]["count"], 5)
+
+    def test_untagged_trace_matches_live_fingerprint(self):
+        with open(os.path.join(self.folder, "other.log"), "w") as log_file:
+            for line in open(self.log_file):
+                log_file.write(line.replace(f"Exception [{self.fp}]", "Exception"))
+        self.assertEqual(list(report.collect_errors(self.folder, workers=1)), [self.fp])
+
+    def test_unchanged_files_come_from_cache(self):
+        report.collect_errors(self.folder, workers=1)
+        with patch.object(report, "scan_file", side_effect=AssertionError("rescanned")):
+            self.assertEqual(report.collect_errors(self.folder)[self.fp]["count"], 8)
+
+    def test_parallel_scan(self):
+        groups = report.collect_errors(self.folder, workers=2, use_cache=False)
+        self.assertEqual(groups[self.fp]["count"], 8)
+
+    def test_errors_command(self):
+        result = CliRunner().invoke(app, ["errors", "--log-folder", self.folder, "--workers", "1"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn(self.fp, result.output)
+        self.assertIn("ZeroDivisionError: division by zero", result.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import itertools
+import time
+import unittest
+from unittest.mock import patch
+from unified_logger.safe_repr import SafeRepr
+
+
+class BrokenRepr:
+    def __repr__(self):
+        raise RuntimeError("broken")
+
+
+class HugeFrame:
+    shape = (5000000, 3)
+
+    def __len__(self):
+        return 5000000
+
+    def __repr__(self):
+        raise AssertionError("__repr__ of a huge object must not be called")
+
+
+class SlowRepr:
+    def __repr__(self):
+        time.sleep(0.02)
+        return "slow"
+
+
+class TestSafeRepr(unittest.TestCase):
+
+    def setUp(self):
+        self.safe_repr = SafeRepr(max_depth=2, max_items=3, max_string=10)
+
+    def test_depth_and_items(self):
+        self.assertEqual(self.safe_repr.repr([1, [2, [3]]]), "[1, [2, [...]]]")
+        self.assertEqual(self.safe_repr.repr(list(range(10))), "[0, 1, 2, ...]")
+
+    def test_long_string(self):
+        self.assertLessEqual(len(self.safe_repr.repr("x" * 10000)), 12)
+
+    def test_broken_repr(self):
+        self.assertIn("BrokenRepr instance", self.safe_repr.repr(BrokenRepr()))
+
+    def test_huge_object_is_summarised(self):
+        self.assertIn("shape=(5000000, 3)", self.safe_repr.repr(HugeFrame()))
+
+    def test_huge_dicts_and_sets_are_summarised(self):
+        safe_repr = SafeRepr(max_sized_len=100)
+        with patch("reprlib._possibly_sorted", side_effect=AssertionError("sorted every key")):
+            self.assertRegex(safe_repr.repr(dict.fromkeys(range(1000))), r"^<dict len=1000 at 0x[0-9a-f]+>$")
+            self.assertIn("<set len=1000 at", safe_repr.repr(set(range(1000))))
+            self.assertIn("<frozenset len=1000 at", safe_repr.repr([frozenset(range(1000))]))
+        self.assertEqual(safe_repr.repr({1: 2}), "{1: 2}")
+
+    def test_type_limits(self):
+        safe_repr = SafeRepr(type_limits={"dict": 8})
+        self.assertEqual(safe_repr.repr({"key": "value"}), "{'key...")
+
+    def test_time_budget(self):
+        safe_repr = SafeRepr(time_budget=0.01)
+        rendered = safe_repr.repr_locals({"a": SlowRepr(), "b": SlowRepr(), "c": SlowRepr()})
+        self.assertEqual(rendered, "{'a': slow, 'b': ..., 'c': ...}")
+
+    def test_cache(self):
+        value = (1, 2, 3)
+        self.safe_repr.repr(value)
+        self.assertEqual(len(self.safe_repr.cache), 4)  # The tuple and its items
+        self.assertEqual(self.safe_repr.repr(value), "(1, 2, 3)")
+        self.assertEqual(self.safe_repr.repr((True,)), "(True,)")  # Equal to (1,), different repr
+        self.assertEqual(self.safe_repr.repr((1.0,)), "(1.0,)")
+
+    def test_mutable_contents_are_not_cached(self):
+        value = ([1],)
+        self.assertEqual(self.safe_repr.repr(value), "([1],)")
+        value[0].append(2)
+        self.assertEqual(self.safe_repr.repr(value), "([1, 2],)")
+
+    def test_large_values_are_not_cached(self):
+        self.safe_repr.repr((bytes(100000),))
+        self.assertEqual(len(self.safe_repr.cache), 0)  # A key would keep the bytes alive
+
+    def test_cut_short_repr_is_not_cached(self):
+        safe_repr = SafeRepr(max_items=10, time_budget=0.01)
+        ticks = itertools.count()
+        with patch("unified_logger.safe_repr.time.monotonic", lambda: next(ticks) * 0.002):
+            self.assertIn("...", safe_repr.repr(tuple(range(10))))
+        self.assertEqual(safe_repr.repr(tuple(range(10))), "(0, 1, 2, 3, 4, 5, 6, 7, 8, 9)")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import re
+import time
+import unittest
+from unified_logger.records import RecordStore
+from unified_logger.search import Query, FilterView, ChunkCache, SearchWorker, CHUNK_ROWS
+
+
+def make_store(rows):
+    store = RecordStore()
+    for i in range(rows):
+        store.append(float(i), "ERROR" if i % 10 == 0 else "INFO", f"request {i} took {i % 7}ms")
+    return store
+
+
+class TestSearch(unittest.TestCase):
+
+    def test_query_matching(self):
+        store = make_store(20)
+        self.assertTrue(Query("REQUEST 3 ").matches(store, 3))
+        self.assertFalse(Query("request 3 ").matches(store, 4))
+        self.assertTrue(Query(r"took [56]ms", regex=True).matches(store, 5))
+        self.assertTrue(Query("", levels={"ERROR"}).matches(store, 10))
+        self.assertFalse(Query("request", levels={"ERROR"}).matches(store, 11))
+        with self.assertRaises(re.error):
+            Query("(", regex=True)
+
+    def test_refines(self):
+        self.assertTrue(Query("request 12").refines(Query("request 1")))
+        self.assertFalse(Query("request 1").refines(Query("request 12")))
+        self.assertTrue(Query("x", levels={"ERROR"}).refines(Query("", levels={"ERROR", "INFO"})))
+        self.assertFalse(Query("x").refines(Query("", levels={"ERROR"})))
+        self.assertFalse(Query("a.c", regex=True).refines(Query("a")))
+        self.assertTrue(Query("a", stream=1).refines(Query("", stream=1)))
+        self.assertFalse(Query("a").refines(Query("", stream=1)))
+
+    def test_query_limited_to_stream(self):
+        store = make_store(3)
+        store.append(3.0, "INFO", "request 3 from remote", stream="remote")
+        remote = store.intern("stream", "remote")
+        self.assertEqual(list(Query("request", stream=remote).scan(store, range(4))), [3])
+        self.assertEqual(len(Query("request").scan(store, range(4))), 4)
+
+    def test_refined_query_scans_previous_matches_only(self):
+        store = make_store(CHUNK_ROWS)
+        cache = ChunkCache()
+        broad = cache.matches(store, Query("request 1"), 0)
+        scanned = []
+        refined = Query("request 12")
+        original_scan = refined.scan
+        refined.scan = lambda store, rows: scanned.append(len(rows)) or original_scan(store, rows)
+        rows = cache.matches(store, refined, 0)
+        self.assertEqual(scanned, [len(broad)])
+        self.assertEqual(list(rows), [row for row in range(CHUNK_ROWS) if "request 12" in store.message(row)])
+        self.assertIs(cache.matches(store, Query("Request 12"), 0), rows)
+
+    def test_worker_fills_view_in_order(self):
+        store = make_store(CHUNK_ROWS * 2 + 100)
+        view = FilterView(Query("took 0ms"), len(store))
+        worker = SearchWorker(store)
+        worker.start(view)
+        deadline = time.monotonic() + 5
+        while not view.done and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(view.done)
+        expected = [row for row in range(len(store)) if row % 7 == 0]
+        self.assertEqual(list(view.scanned), expected)
+        row = store.append(0.0, "INFO", "request x took 0ms")
+        view.add_live(store, row)
+        store.append(0.0, "INFO", "request y took 1ms")
+        view.add_live(store, row + 1)
+        self.assertEqual(len(view), len(expected) + 1)
+        self.assertEqual(view[len(view) - 1], row)
+
+    def test_view_renumbered_after_compaction(self):
+        store = RecordStore(capacity=10, max_rows=20)
+        for i in range(30):
+            store.append(float(i), "INFO", f"request {i} took {i % 7}ms")
+        view = FilterView(Query("took 0ms"), len(store))
+        view.scanned.extend(row for row in range(len(store)) if row % 7 == 0)
+        view.add_live(store, store.append(30.0, "INFO", "request x took 0ms"))
+        count = store.compact()
+        self.assertEqual(count, 16)
+        self.assertEqual(view.drop(store, count), 3)  # Rows 0, 7 and 14
+        self.assertEqual(list(view), [5, 12, 14])
+        self.assertEqual([store.message(row) for row in view][:2], ["request 21 took 0ms", "request 28 took 0ms"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from array import array
+from unified_logger.records import RecordStore, FacetView, LEVEL_ORDER
+from unified_logger import table
+from unified_logger.search import FilterView, Query
+from unified_logger.table import TableView, argsort, filter_range, row_array
+
+
+def make_store():
+    store = RecordStore()
+    for timestamp, level, stream in ((3.0, "INFO", "live"), (1.0, "ERROR", "worker"), (2.0, "DEBUG", "live"),
+                                     (1.0, "WARNING", "api"), (5.0, "ERROR", "live")):
+        store.append(timestamp, level, f"{level} at {timestamp}", stream=stream)
+    return store
+
+
+class TestTable(unittest.TestCase):
+
+    def test_argsort_columns(self):
+        store = make_store()
+        self.assertEqual(list(argsort(store, None, "time")), [1, 3, 2, 0, 4])  # Ties keep store order
+        self.assertEqual(list(argsort(store, None, "time", descending=True)), [4, 0, 2, 1, 3])
+        self.assertEqual(list(argsort(store, None, "level")), [2, 0, 3, 1, 4])  # By severity, not first seen
+        self.assertEqual(list(argsort(store, None, "source")), [3, 0, 2, 4, 1])
+        self.assertEqual(list(argsort(store, FacetView(store, {"stream": 0}), "level", True)), [4, 0, 2])
+        with self.assertRaises(ValueError):
+            argsort(store, None, "message")
+
+    def test_filter_range(self):
+        store = make_store()
+        self.assertEqual(list(filter_range(store, None, "time", 1.5, 4.0)), [0, 2])
+        self.assertEqual(list(filter_range(store, [4, 3, 1], "level", LEVEL_ORDER.index("ERROR"))), [4, 1])
+
+    def test_table_view_follows_time_order(self):
+        store = make_store()
+        view = TableView(store, ranges={"level": (LEVEL_ORDER.index("INFO"), None)})
+        self.assertEqual(list(view), [1, 3, 0, 4])
+        for level in ("TRACE", "CRITICAL"):
+            view.add_live(store, store.append(6.0, level, "new"))
+        self.assertEqual(list(view), [1, 3, 0, 4, 6])
+        self.assertEqual(view.position(0), 2)
+        by_level = TableView(store, column="level")
+        by_level.add_live(store, store.append(7.0, "INFO", "new"))
+        self.assertEqual(len(by_level), 7)
+        self.assertEqual(by_level.stale, 1)
+
+    def test_row_array_uses_view_arrays(self):
+        store = make_store()
+        live = FacetView(store, {"stream": 0})
+        self.assertIs(row_array(store, live), store.postings["stream"][0])  # No per-row copy
+        search = FilterView(Query("at"), 3)
+        search.scanned.extend([0, 2])
+        search.live.append(4)
+        self.assertEqual(row_array(store, search), array("I", [0, 2, 4]))
+        self.assertEqual(list(argsort(store, search, "level", True)), [4, 0, 2])
+        self.assertEqual(row_array(store, [3, 1]), array("I", [3, 1]))
+
+    def test_table_view_renumbered_after_compaction(self):
+        store = make_store()
+        view = TableView(store, FacetView(store, {"stream": 0, "level": store.level_id("ERROR")}), column="level")
+        self.assertEqual(list(view), [4])
+        by_time = TableView(store)
+        self.assertEqual(by_time.drop(store, 2), 2)  # Rows 1 and 0 went
+        self.assertEqual(list(by_time), [1, 0, 2])
+        self.assertEqual(view.drop(store, 2), 0)
+        self.assertEqual(list(view), [2])
+        self.assertEqual(list(view.source), [2])
+
+    def test_same_order_without_numpy(self):
+        if table.numpy is None:
+            self.skipTest("NumPy not installed; the fallback is what the other tests ran")
+        store = make_store()
+        results = [list(argsort(store, None, column, descending)) for column in table.SORT_COLUMNS for descending in (False, True)]
+        numpy, table.numpy = table.numpy, None
+        try:
+            fallback = [list(argsort(store, None, column, descending)) for column in table.SORT_COLUMNS for descending in (False, True)]
+        finally:
+            table.numpy = numpy
+        self.assertEqual(results, fallback)
+
+
+if __name__ == '__main__':
+    unittest.main()
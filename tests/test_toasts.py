@@ -0,0 +1,38 @@
+import unittest
+from unified_logger.toasts import ToastQueue, toast_text, MAX_TOAST_CHARS
+
+
+class TestToastQueue(unittest.TestCase):
+
+    def test_burst_merges_into_one_toast(self):
+        queue = ToastQueue(window=0.5, rate=100)
+        for i in range(200):
+            queue.add(f"boom {i}", "error", now=10.0 + i / 1000)
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue.take(3, now=10.3), [])  # Still collecting
+        self.assertEqual(queue.take(3, now=10.6), [("error", "200 new errors", "Latest: boom 199")])
+        self.assertEqual(queue.merged, 199)
+        self.assertEqual(len(queue), 0)
+
+    def test_single_message_keeps_its_text(self):
+        queue = ToastQueue(window=0.5, rate=100)
+        queue.add("saved", "info", now=0.0)
+        self.assertEqual(queue.take(1, now=1.0), [("info", "INFO", "saved")])
+
+    def test_rate_and_free_windows_limit_release(self):
+        queue = ToastQueue(window=0.0, rate=2)
+        for level in ("info", "warning", "error"):
+            queue.add("x", level, now=0.0)
+        self.assertEqual([toast[0] for toast in queue.take(3, now=1.0)], ["info"])
+        self.assertEqual(queue.take(3, now=1.2), [])  # Under half a second since the last one
+        queue.add("y", "warning", now=1.3)  # Waiting entries keep merging
+        self.assertEqual(queue.take(0, now=2.0), [])  # No free window
+        self.assertEqual(queue.take(3, now=2.0), [("warning", "2 new warnings", "Latest: y")])
+
+    def test_long_messages_are_clipped(self):
+        title, message = toast_text("info", 1, "x" * (MAX_TOAST_CHARS * 2))
+        self.assertEqual(len(message), MAX_TOAST_CHARS + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
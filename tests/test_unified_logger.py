@@ -1,24 +1,35 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from unified_logger.unified_logger import UnifiedLogger
+from unified_logger.frames import ExceptionSnapshot
 import tkinter as tk
 from tkinter import Canvas, Scrollbar, Label, Button, Listbox, Text
 
 class TestUnifiedLogger(unittest.TestCase):
 
     def setUp(self):
-        self.logger = UnifiedLogger(interfaces="cli")
+        self.folder = tempfile.mkdtemp()  # Not the default logs folder under the working directory
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+        self.logger = UnifiedLogger(interfaces="cli", log_folder=self.folder)
 
     def test_init(self):
         self.assertEqual(self.logger.log_level, 'DEBUG')
-        self.assertEqual(self.logger.log_folder, 'logs')
+        with patch.object(UnifiedLogger, 'init_loguru'):  # No log file in the default folder
+            self.assertEqual(UnifiedLogger(interfaces="cli").log_folder, 'logs')
 
     def test_set_level(self):
         self.logger.set_level('INFO')
         self.assertEqual(self.logger.log_level, 'INFO')
 
     def test_display(self):
-        with patch('unified_logger.unified_logger.logger') as mock_logger:
+        with patch.object(self.logger, 'logger') as mock_logger:
             self.logger.display("Test message", level="info")
             mock_logger.info.assert_called_once_with("Test message")
 
@@ -34,14 +45,14 @@ class TestUnifiedLogger(unittest.TestCase):
 
 
     def test_display_toast(self):
-        log = UnifiedLogger()
+        log = UnifiedLogger(log_folder=self.folder)
         log.root = MagicMock()
         log.get_icon_name = MagicMock(return_value="info-circle")
         log.get_boot_style = MagicMock(return_value="info")
 
-        with patch('unified_logger.unified_logger.Toast.show_toast') as mock_toast_show:
+        with patch.object(log.toast_queue, 'add') as mock_toast_add:
             log.display_toast("Test message", "info")
-            mock_toast_show.assert_called_once()
+            mock_toast_add.assert_called_once_with("Test message", "info", snapshot=None)
 
 
 
@@ -54,12 +65,56 @@ class TestUnifiedLogger(unittest.TestCase):
 
 
     def test_log_exception(self):
-        with patch('unified_logger.unified_logger.logger') as mock_logger:
+        with patch.object(self.logger, 'logger') as mock_logger:
             try:
                 raise ValueError("Test exception")
             except Exception as e:
                 self.logger.log_exception(e)
-                mock_logger.exception.assert_called()
+                mock_logger.bind.return_value.error.assert_called()
+                self.assertIsInstance(mock_logger.bind.call_args.kwargs["traceback"], ExceptionSnapshot)
+
+    def test_log_exception_repeats_are_compact(self):
+        self.logger.exception_aggregator.full_limit = 1
+        with patch.object(self.logger, 'logger') as mock_logger:
+            for _ in range(3):
+                try:
+                    raise ValueError("Test exception")
+                except Exception as e:
+                    self.logger.log_exception(e)
+            mock_logger.bind.return_value.error.assert_called_once()
+            self.assertEqual(mock_logger.error.call_count, 2)
+            self.assertIn("repeated (3 total)", mock_logger.error.call_args[0][0])
+
+    def test_one_reference_per_repeated_exception(self):
+        self.logger.exception_aggregator.full_limit = 1
+        with patch.object(self.logger, 'logger') as mock_logger:
+            for _ in range(3):
+                try:
+                    raise ValueError("Test exception")
+                except Exception as e:
+                    self.logger.log_exception(e)
+                    self.logger.custom_traceback(e)  # Same exception: no second entry
+            self.assertEqual(mock_logger.bind.call_count, 2)  # Both full entries of the first one
+            references = [call.args[0] for call in mock_logger.error.call_args_list]
+            self.assertEqual(len(references), 2)
+            self.assertIn("repeated (2 total)", references[0])
+            self.assertIn("repeated (3 total)", references[1])
+
+    def test_exception_storm_switches_to_summaries(self):
+        self.logger.circuit_breaker.threshold = 0.5  # More than 5 exceptions in the 10s window
+        with patch.object(self.logger, 'logger') as mock_logger:
+            for i in range(20):
+                try:
+                    raise ValueError(f"Storm {i}")
+                except Exception as e:
+                    self.logger.log_exception(e)
+            self.assertLessEqual(mock_logger.bind.return_value.error.call_count + mock_logger.error.call_count, 6)
+            self.assertIsNotNone(self.logger.storm_timer)
+            self.logger.close(timeout=1)
+            summaries = [call[0][0] for call in mock_logger.warning.call_args_list if "Exception storm" in call[0][0]]
+            self.assertEqual(len(summaries), 1)
+            self.assertIn("exceptions in", summaries[0])
+        self.assertIsNone(self.logger.storm_timer)
 
     def test_add_cli_command(self):
         @self.logger.add_cli_command
@@ -77,35 +132,182 @@ class TestUnifiedLogger(unittest.TestCase):
         self.logger.set_format(format)
         self.assertEqual(self.logger.log_format, format)
 
+    def test_instances_have_isolated_sinks(self):
+        other = UnifiedLogger(interfaces="cli", log_folder=self.folder)
+        ours, theirs = [], []
+        self.logger.add_logging_sink(ours.append, level="DEBUG")
+        other.add_logging_sink(theirs.append, level="DEBUG")
+        self.logger.display("only ours")
+        other.set_level('ERROR')
+        self.logger.display("still ours")
+        self.assertEqual(len(ours), 2)
+        self.assertEqual(theirs, [])
+
+    def test_add_logging_sink_with_policy(self):
+        received = []
+        sink_id = self.logger.add_logging_sink(received.append, level="DEBUG", policy="drop_newest", max_queue=100)
+        self.logger.display("queued message")
+        for _ in range(100):
+            if self.logger.sink_stats()[sink_id]["delivered"]:
+                break
+            time.sleep(0.01)
+        self.assertEqual(len(received), 1)
+        self.assertEqual(self.logger.sink_stats()[sink_id]["delivered"], 1)
+
+    def test_close(self):
+        received = []
+        self.logger.add_logging_sink(received.append, level="DEBUG", policy="block")
+        for i in range(20):
+            self.logger.display(f"message {i}")
+        report = self.logger.close(timeout=2)
+        self.assertEqual(report, {"unflushed": {}, "timed_out": []})
+        self.assertEqual(len(received), 20)
+        self.assertIsNone(self.logger.file_sink)
+        self.assertEqual(self.logger.close(), {"unflushed": {}, "timed_out": []})
+
     def test_add_stream_handler(self):
         self.logger.add_stream_handler()
         self.assertIsNotNone(self.logger.log_stream_handler)
 
+    def test_cli_prints_to_stderr(self):
+        with patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            log = UnifiedLogger(interfaces="cli", log_folder=self.folder)
+            log.add_stream_handler()  # No second sink
+            log.display("to the console")
+            log.close(timeout=2)
+        self.assertEqual(stderr.getvalue().count("to the console"), 1)
+
 
 
     def test_init_loguru(self):
-        with patch('loguru.logger.add') as mock_logger_add:
-            self.logger.init_loguru(log_level='INFO', log_folder='logs_test')
+        with patch.object(self.logger.logger, 'add') as mock_logger_add:
+            folder = os.path.join(self.folder, 'logs_test')
+            self.logger.init_loguru(log_level='INFO', log_folder=folder)
             mock_logger_add.assert_called_once()
             self.assertEqual(self.logger.log_level, 'INFO')
-            self.assertEqual(self.logger.log_folder, 'logs_test')
+            self.assertEqual(self.logger.log_folder, folder)
 
     def test_run_gui(self):
         with patch('tkinter.Tk.mainloop') as mock_mainloop:
-            log = UnifiedLogger(interfaces="gui")
+            log = UnifiedLogger(interfaces="gui", log_folder=self.folder)
+            log.gui_thread.join(timeout=5)  # Tk runs on its own thread; the patched mainloop returns at once
             mock_mainloop.assert_called_once()
 
+    def test_call_in_gui_hands_off_from_other_threads(self):
+        log = UnifiedLogger(interfaces="cli", log_folder=self.folder)
+        calls = []
+        log.call_in_gui(calls.append, 1)  # No GUI thread yet: runs inline
+        log.gui_thread = threading.Thread(target=lambda: None)
+        log.call_in_gui(calls.append, 2)
+        self.assertEqual(calls, [1])
+        self.assertEqual(list(log.gui_calls), [(calls.append, (2,))])
+        for call in (lambda: log.filter_log_viewer("x"), lambda: log.show_facets({}), log.toggle_table,
+                     log.copy_to_clipboard, log.create_debug_console, lambda: log.configure_cli_command("run", a=1)):
+            call()  # Would touch Tk from this thread if not handed off
+        self.assertEqual(len(log.gui_calls), 7)
+        log.gui_thread = None
+
+    def test_run_gui_again_waits_for_the_window(self):
+        log = UnifiedLogger(interfaces="cli", log_folder=self.folder)
+        gui_thread = log.gui_thread = threading.Thread(target=time.sleep, args=(0.2,))  # Stand-in for a running Tk thread
+        gui_thread.start()
+        self.assertFalse(log.wait_gui(timeout=0.01))
+        log.run_gui()  # Blocks until the window is closed instead of starting a second Tk
+        self.assertFalse(gui_thread.is_alive())
+        self.assertIs(log.gui_thread, gui_thread)
+        self.assertTrue(log.wait_gui())
+        log.gui_thread = None
+        log.close(timeout=2)
+
     def test_run_cli(self):
-        log = UnifiedLogger(interfaces="cli")
+        log = UnifiedLogger(interfaces="cli", log_folder=self.folder)
         self.assertEqual(log.run_cli(), None)  # No commands registered, so it returns None
 
+    def test_snapshots_rendered_on_the_gui_side(self):
+        self.logger.remove_file_sink()  # These render on the logging thread, as plain sinks must
+        self.logger.logger.remove(self.logger.log_stream_handler)
+        self.logger.logger.add(self.logger.update_log_viewer, level="DEBUG")
+        try:
+            raise ValueError("Test exception")
+        except Exception as e:
+            self.logger.custom_traceback(e, gui=True)
+        *fields, snapshot = self.logger.viewer_queue.take()[-1]
+        self.assertTrue(fields[2].startswith("Custom Traceback ["))
+        self.assertIsInstance(snapshot, ExceptionSnapshot)
+        self.assertIsNone(snapshot.text)  # Not rendered by the logging thread
+        [(level, title, message)] = self.logger.toast_queue.take(1, now=float("inf"))
+        self.assertEqual(message.splitlines(), [fields[2], "ValueError: Test exception"])
+        self.assertIsNone(snapshot.text)  # Toasts show the exception line only
+
     def test_custom_traceback(self):
-        with patch('loguru.logger.error') as mock_logger_error:
+        with patch.object(self.logger.logger, 'bind') as mock_bind:
             try:
                 raise ValueError("Test exception")
             except Exception as e:
                 self.logger.custom_traceback(e)
-                mock_logger_error.assert_called()
+                mock_bind.return_value.error.assert_called()
+
+    def test_traceback_rendered_by_sinks(self):
+        direct, queued = [], []
+        self.logger.add_logging_sink(direct.append, level="DEBUG")
+        sink_id = self.logger.add_logging_sink(queued.append, level="DEBUG", policy="block")
+        try:
+            raise ValueError("Test exception")
+        except Exception as e:
+            self.logger.custom_traceback(e)
+        self.logger.queued_sinks[sink_id].close(timeout=2)
+        for text in (direct[0], queued[0]):
+            self.assertIn("Traceback (most recent call last):", text)
+            self.assertIn('raise ValueError("Test exception")', text)
+            self.assertIn("ValueError: Test exception", text)
+
+    def test_structured_sink(self):
+        lines = []
+        self.logger.add_structured_sink(lines.append, max_bytes=2000)
+        self.logger.display("plain message")
+        try:
+            raise ValueError("Test exception" * 500)
+        except Exception as e:
+            self.logger.log_exception(e)
+        self.logger.close(timeout=2)
+        plain, error = [json.loads(line) for line in lines]
+        self.assertEqual((plain["level"], plain["message"]), ("INFO", "plain message"))
+        self.assertEqual(error["exception"]["type"], "ValueError")
+        self.assertEqual(error["exception"]["frames"][-1]["function"], "test_structured_sink")
+        self.assertEqual(len(error["fingerprint"]), 12)
+        self.assertTrue(all(len(line) <= 2001 for line in lines))
+
+    def test_structured_sink_cuts_escaped_text_to_valid_json(self):
+        lines = []
+        self.logger.add_structured_sink(lines.append, max_bytes=500)
+        self.logger.display("é" * 2000)
+        self.logger.display('"\\\n\t' * 1000)
+        self.logger.display("😀" * 1000)
+        self.logger.close(timeout=2)
+        self.assertEqual(len(lines), 3)
+        for line in lines:
+            record = json.loads(line)
+            self.assertTrue(record["truncated"])
+            self.assertLessEqual(len(line.rstrip("\n").encode("utf-8")), 500)
+        self.assertTrue(json.loads(lines[0])["message"].startswith("ééé"))
+
+    def test_viewer_source_feeds_before_viewer_is_built(self):
+        log = UnifiedLogger(interfaces="cli", log_folder=self.folder)
+        log.gui_thread = threading.Thread()  # Stand-in for a Tk thread: GUI calls are only handed off
+        log.create_log_viewer()
+        feed = log.add_viewer_source("worker-1")
+        feed(1.0, "INFO", "hello")
+        self.assertEqual(len(log.gui_calls), 2)
+        self.assertEqual(log.viewer_queue.take(), [(1.0, "INFO", "hello", -1, None, "", "", "worker-1", None)])
+        log.gui_thread = None
+        log.close(timeout=2)
+
+    def test_queued_file_sink(self):
+        log = UnifiedLogger(interfaces="cli", log_folder=self.folder, file_policy="block")
+        log.display("Queued file message")
+        log.close(timeout=2)
+        with open(log.log_file) as log_file:
+            self.assertIn("Queued file message", log_file.read())
 
 
     # def test_copy_to_clipboard(self):
@@ -0,0 +1,37 @@
+import unittest
+from unified_logger.viewer import IngestQueue, SPEEDS
+
+
+class TestIngestQueue(unittest.TestCase):
+
+    def test_take_is_limited_to_the_frame_budget(self):
+        queue = IngestQueue()
+        queue.set_budget(10, 50)
+        self.assertEqual(queue.interval, 100)
+        self.assertEqual(queue.batch, 5)
+        for i in range(12):
+            queue.put(i)
+        self.assertEqual(queue.take(), [0, 1, 2, 3, 4])
+        self.assertEqual(queue.take(), [5, 6, 7, 8, 9])
+        self.assertEqual(queue.take(), [10, 11])
+        self.assertEqual(queue.take(), [])
+
+    def test_speed_presets(self):
+        queue = IngestQueue()
+        fps, rate = SPEEDS["fast"]
+        queue.set_budget(fps, rate)
+        self.assertGreater(queue.batch, 1)
+        self.assertLess(queue.interval, 1000 / SPEEDS["slow"][0])
+
+    def test_overflow_drops_oldest_and_counts(self):
+        queue = IngestQueue(max_pending=3)
+        queue.set_budget(1, 100)
+        for i in range(5):
+            queue.put(i)
+        self.assertEqual(queue.take(), [2, 3, 4])
+        self.assertEqual(queue.take_dropped(), 2)
+        self.assertEqual(queue.take_dropped(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
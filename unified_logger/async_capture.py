@@ -0,0 +1,87 @@
+import asyncio
+import contextvars
+import sys
+
+
+# Names of the tasks that created the current one, outermost first. Set by chained_task_factory;
+# the Task context= argument it relies on exists from Python 3.11.
+task_chain = contextvars.ContextVar("unified_logger_task_chain", default=())
+TASK_CHAIN_SUPPORTED = sys.version_info >= (3, 11)
+MAX_AWAIT_DEPTH = 32
+
+
+def chained_task_factory(loop, coro, **kwargs):
+    # A copy even of a context the caller passed, which the caller may keep using. An empty
+    # Context is falsy, so test for None.
+    context = kwargs.pop("context", None)
+    context = contextvars.copy_context() if context is None else context.copy()
+    parent = asyncio.current_task(loop)
+    if parent is not None:
+        # Runs in the copied context, so task_chain.get() still sees the parent's chain
+        context.run(lambda: task_chain.set(task_chain.get() + (parent.get_name(),)))
+    return asyncio.Task(coro, loop=loop, context=context, **kwargs)
+
+
+def current_task():
+    try:
+        return asyncio.current_task()
+    except RuntimeError:
+        return None  # No running loop on this thread
+
+
+def task_context(task):
+    # The running task's context is the current one; reading another task's needs Task.get_context() (3.12+)
+    if task is current_task():
+        return contextvars.copy_context()
+    get_context = getattr(task, "get_context", None)
+    if get_context is not None:
+        return get_context()
+    return None
+
+
+def await_chain(task):
+    # Follow cr_await from the task's coroutine: attribute reads only, no frame inspection
+    names = []
+    awaitable = task.get_coro()
+    while awaitable is not None and len(names) < MAX_AWAIT_DEPTH:
+        code = getattr(awaitable, "cr_code", None) or getattr(awaitable, "gi_code", None)
+        if code is None:
+            names.append(type(awaitable).__name__)  # A Future or other awaitable at the bottom
+            break
+        names.append(getattr(code, "co_qualname", code.co_name))
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return names
+
+
+def describe_task(task, safe_repr):
+    if task is None or not hasattr(task, "get_coro"):
+        return None  # Not in a task, or a plain Future
+    context = task_context(task)
+    variables = {}
+    chain = ()
+    if context is not None:
+        chain = context.get(task_chain, ())
+        for var, value in context.items():
+            if var is not task_chain:
+                variables[var.name] = safe_repr.repr(value)
+    return {"task": task.get_name(), "chain": list(chain), "awaiting": await_chain(task), "contextvars": variables}
+
+
+def format_task(info: dict):
+    chain = " > ".join(info["chain"] + [info["task"]])
+    text = f"Task: {chain}"
+    if info["awaiting"]:
+        text += f" | Awaiting: {' > '.join(info['awaiting'])}"
+    if info["contextvars"]:
+        text += " | Context: {" + ", ".join(f"{name!r}: {value}" for name, value in info["contextvars"].items()) + "}"
+    return text
+
+
+def innermost_locals(e: BaseException):
+    # Locals where the exception was raised, for callers that aren't in the failing code path
+    tb = e.__traceback__
+    if tb is None:
+        return {}
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    return tb.tb_frame.f_locals
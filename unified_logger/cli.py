@@ -0,0 +1,25 @@
+import typer
+from .report import collect_errors, format_report
+
+
+app = typer.Typer()
+
+
+@app.callback()
+def callback():
+    """UnifiedLogger command line tools."""
+
+
+@app.command()
+def errors(log_folder: str = typer.Option("logs", help="Folder written by init_loguru, including rotated and compressed files"),
+           workers: int = typer.Option(None, help="Processes used to scan files (default: one per CPU)"),
+           top: int = typer.Option(20, help="Number of exception groups to list"),
+           samples: int = typer.Option(3, help="Number of groups to print a sample traceback for"),
+           cache: bool = typer.Option(True, help="Reuse per-file results of unchanged files")):
+    """Group the exceptions in a log folder by fingerprint."""
+    groups = collect_errors(log_folder, workers=workers, use_cache=cache)
+    typer.echo(format_report(groups, top=top, samples=samples))
+
+
+def main():
+    app()
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import threading
+import time
+import itertools
+import traceback
+from collections import deque
+
+
+memo_ids = itertools.count()
+
+
+def exception_type_name(e: BaseException):
+    # Same naming as the last line of a printed traceback, so text and live exceptions fingerprint alike
+    exc_type = type(e)
+    if exc_type.__module__ in ("builtins", "__main__"):
+        return exc_type.__qualname__
+    return f"{exc_type.__module__}.{exc_type.__qualname__}"
+
+
+def frame_keys(e: BaseException):
+    # (file, function, line) per frame; walk_tb only touches frame objects, no source is read
+    return tuple(
+        (os.path.normcase(frame.f_code.co_filename), frame.f_code.co_name, lineno)
+        for frame, lineno in traceback.walk_tb(e.__traceback__)
+    )
+
+
+def fingerprint_key(type_name: str, frames: tuple):
+    key = repr((type_name, frames))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+
+def fingerprint(e: BaseException):
+    return fingerprint_key(exception_type_name(e), frame_keys(e))
+
+
+def remember(e: BaseException, memo: str, value):
+    # Stored under a name unique to the aggregator or breaker, so each UnifiedLogger decides for itself.
+    # Built-in exceptions can't be weakly referenced, which rules out a WeakKeyDictionary.
+    try:
+        setattr(e, memo, value)
+    except AttributeError:
+        pass  # Exceptions with __slots__ are simply counted again
+
+
+class ExceptionAggregator:
+    # Counts exceptions per fingerprint. Only the first `full_limit` occurrences of a fingerprint
+    # within `window` seconds are meant to be logged in full; later ones as compact references.
+    def __init__(self, full_limit: int = 3, window: float = 60.0):
+        self.full_limit = full_limit
+        self.window = window
+        self.groups = {}  # fingerprint -> counters and first/last seen
+        self.memo = f"_unified_logger_seen_{next(memo_ids)}"  # Attribute holding this aggregator's decision
+        self.lock = threading.Lock()
+
+    def record(self, e: BaseException, now: float = None):
+        # Returns (fingerprint, total count, log in full). The decision is remembered per exception
+        # so log_exception and custom_traceback on the same exception count it once.
+        seen = getattr(e, self.memo, None)
+        if seen is not None:
+            return seen
+        fp = fingerprint(e)
+        now = time.time() if now is None else now
+        with self.lock:
+            group = self.groups.get(fp)
+            if group is None:
+                group = {"type": exception_type_name(e), "message": str(e), "count": 0,
+                         "first_seen": now, "last_seen": now, "window_start": now, "window_count": 0}
+                self.groups[fp] = group
+            if now - group["window_start"] > self.window:
+                group["window_start"] = now
+                group["window_count"] = 0
+            group["count"] += 1
+            group["window_count"] += 1
+            group["last_seen"] = now
+            seen = (fp, group["count"], group["window_count"] <= self.full_limit)
+        remember(e, self.memo, seen)
+        return seen
+
+    def first_reference(self, e: BaseException):
+        # True only the first time: log_exception and custom_traceback on one repeat write one reference
+        memo = f"{self.memo}_referenced"
+        if getattr(e, memo, False):
+            return False
+        remember(e, memo, True)
+        return True
+
+    def summary(self):
+        with self.lock:
+            return {fp: dict(group) for fp, group in self.groups.items()}
+
+    def reset(self):
+        with self.lock:
+            self.groups.clear()
+
+
+class CircuitBreaker:
+    # Trips when exceptions arrive faster than `threshold` per second (averaged over `window` seconds).
+    # While tripped, callers only count exceptions per fingerprint and log periodic summaries;
+    # it resets once the rate falls below threshold * recovery_ratio.
+    def __init__(self, threshold: float = 50.0, window: float = 10.0, recovery_ratio: float = 0.5, summary_interval: float = 30.0):
+        self.threshold = threshold
+        self.window = window
+        self.recovery_ratio = recovery_ratio
+        self.summary_interval = summary_interval
+        self.buckets = deque()  # [second, count], oldest first
+        self.total = 0
+        self.degraded = False
+        self.pending = {}  # fingerprint -> [count, summary] since the last summary
+        self.pending_since = None
+        self.memo = f"_unified_logger_degraded_{next(memo_ids)}"
+        self.lock = threading.Lock()
+
+    def rate(self, now: float):
+        # Called with the lock held
+        while self.buckets and self.buckets[0][0] <= now - self.window:
+            self.total -= self.buckets.popleft()[1]
+        return self.total / self.window
+
+    def record(self, e: BaseException, fp: str, now: float = None):
+        # Returns True while degraded. Remembered per exception like ExceptionAggregator.record.
+        degraded = getattr(e, self.memo, None)
+        if degraded is not None:
+            return degraded
+        now = time.time() if now is None else now
+        second = int(now)
+        with self.lock:
+            if self.buckets and self.buckets[-1][0] == second:
+                self.buckets[-1][1] += 1
+            else:
+                self.buckets.append([second, 1])
+            self.total += 1
+            if not self.degraded and self.rate(now) > self.threshold:
+                self.degraded = True
+                self.pending_since = now
+            degraded = self.degraded
+            if degraded:
+                entry = self.pending.setdefault(fp, [0, f"{type(e).__name__}: {e}"[:200]])
+                entry[0] += 1
+        remember(e, self.memo, degraded)
+        return degraded
+
+    def take_summary(self, now: float = None):
+        # Counts per fingerprint since the last summary, and whether the breaker is still tripped
+        now = time.time() if now is None else now
+        with self.lock:
+            summary, since = self.pending, self.pending_since
+            self.pending, self.pending_since = {}, now
+            if self.degraded and self.rate(now) < self.threshold * self.recovery_ratio:
+                self.degraded = False
+            return summary, (now - since if since is not None else 0.0), self.degraded
@@ -0,0 +1,201 @@
+import json
+import linecache
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from .fingerprint import exception_type_name
+
+
+CAUSE_HEADER = "\nThe above exception was the direct cause of the following exception:\n\n"
+CONTEXT_HEADER = "\nDuring handling of the above exception, another exception occurred:\n\n"
+
+
+class FrameSnapshot:
+    # Code object and line number only: holding the frame itself would keep every local alive
+    __slots__ = ("code", "lineno", "locals")
+
+    def __init__(self, code, lineno: int, locals: str = None):
+        self.code = code
+        self.lineno = lineno
+        self.locals = locals
+
+
+class ExceptionSnapshot:
+    # What the throwing thread captures: cheap to build, rendered to text only when a sink needs it
+    __slots__ = ("type_name", "message", "exception_only", "frames", "cause", "context", "text")
+
+    def __init__(self, type_name: str, message: str, exception_only: list, frames: list, cause=None, context=None):
+        self.type_name = type_name
+        self.message = message
+        self.exception_only = exception_only
+        self.frames = frames
+        self.cause = cause
+        self.context = context
+        self.text = None
+
+    @classmethod
+    def capture(cls, e: BaseException, safe_repr=None, seen: set = None):
+        # safe_repr, if given, renders each frame's locals now; they would be gone by render time
+        seen = set() if seen is None else seen
+        seen.add(id(e))
+        frames = []
+        for frame, lineno in traceback.walk_tb(e.__traceback__):
+            local_vars = safe_repr.repr_locals(frame.f_locals) if safe_repr is not None else None
+            frames.append(FrameSnapshot(frame.f_code, lineno, local_vars))
+        cause = context = None
+        if e.__cause__ is not None and id(e.__cause__) not in seen:
+            cause = cls.capture(e.__cause__, safe_repr, seen)
+        elif e.__context__ is not None and not e.__suppress_context__ and id(e.__context__) not in seen:
+            context = cls.capture(e.__context__, safe_repr, seen)
+        exception_only = traceback.format_exception_only(type(e), e)
+        try:
+            message = str(e)
+        except Exception:
+            message = "<exception str() failed>"
+        return cls(exception_type_name(e), message, exception_only, frames, cause, context)
+
+    def render(self):
+        if self.text is None:
+            self.text = "".join(self.render_lines()).rstrip("\n")
+        return self.text
+
+    def render_lines(self):
+        if self.cause is not None:
+            yield from self.cause.render_lines()
+            yield CAUSE_HEADER
+        elif self.context is not None:
+            yield from self.context.render_lines()
+            yield CONTEXT_HEADER
+        if self.frames:
+            yield "Traceback (most recent call last):\n"
+            for frame in self.frames:
+                yield frame_cache.render(frame.code, frame.lineno)
+                if frame.locals is not None:
+                    yield f"    Locals: {frame.locals}\n"
+        yield from self.exception_only
+
+    def __str__(self):
+        return self.render()
+
+    def to_dict(self, include_locals: bool = True, include_chain: bool = True):
+        payload = {"type": self.type_name, "message": self.message, "frames": [
+            frame_dict(frame, include_locals) for frame in self.frames
+        ]}
+        for key, chained in (("cause", self.cause), ("context", self.context)):
+            if chained is None:
+                continue
+            if include_chain:
+                payload[key] = chained.to_dict(include_locals, include_chain)
+            else:
+                payload[key] = {"type": chained.type_name, "message": chained.message[:200]}
+        return payload
+
+
+def frame_dict(frame: FrameSnapshot, include_locals: bool = True):
+    code = frame.code
+    payload = {"file": code.co_filename, "function": code.co_name, "line": frame.lineno,
+               "source": linecache.getline(code.co_filename, frame.lineno).strip()}
+    if include_locals and frame.locals is not None:
+        payload["locals"] = frame.locals
+    return payload
+
+
+def capped_payload(snapshot: ExceptionSnapshot, max_bytes: int):
+    # Give up detail step by step until the JSON fits: frame locals, then chained exceptions,
+    # then middle frames, then the message. Sizes are exact bytes since json.dumps escapes to ASCII.
+    payload = snapshot.to_dict()
+    if len(json.dumps(payload)) <= max_bytes:
+        return payload
+    payload = snapshot.to_dict(include_locals=False)
+    if len(json.dumps(payload)) <= max_bytes:
+        return payload
+    payload = snapshot.to_dict(include_locals=False, include_chain=False)
+    frames = payload["frames"]
+    keep = len(frames)
+    while len(json.dumps(payload)) > max_bytes and keep > 2:
+        keep = max(keep // 2, 2)
+        # Keep the outermost frame and the innermost ones, where the exception was raised
+        payload["frames"] = frames[:1] + frames[len(frames) - keep + 1:]
+        payload["frames_omitted"] = len(frames) - keep
+    if len(json.dumps(payload)) > max_bytes:
+        payload["message"] = payload["message"][:max(max_bytes // 4, 0)]
+        payload["truncated"] = True
+    if len(json.dumps(payload)) > max_bytes:
+        payload = {"type": snapshot.type_name, "message": snapshot.message[:100], "truncated": True}
+        while len(json.dumps(payload)) > max_bytes and payload["message"]:
+            payload["message"] = payload["message"][:len(payload["message"]) // 2]
+    return payload
+
+
+def render_frame(code, lineno: int):
+    text = f'  File "{code.co_filename}", line {lineno}, in {code.co_name}\n'
+    line = linecache.getline(code.co_filename, lineno).strip()
+    if line:
+        text += f"    {line}\n"
+    return text
+
+
+def source_mtime(filename: str):
+    try:
+        return os.stat(filename).st_mtime
+    except OSError:
+        return None  # <string>, <stdin>, frozen modules...
+
+
+class FrameCache:
+    # Rendered frame text keyed by (code object, line number), least recently used evicted first.
+    # Each source file's mtime is checked at most once per check_interval; when it changes the
+    # file's entries are dropped and linecache is refreshed so edited sources don't render stale lines.
+    def __init__(self, max_entries: int = 4096, check_interval: float = 1.0):
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.entries = OrderedDict()
+        self.files = {}  # filename -> [mtime, last checked, keys cached for the file]
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, code, lineno: int):
+        key = (code, lineno)
+        with self.lock:
+            self.check_file(code.co_filename, time.monotonic())
+            text = self.entries.get(key)
+            if text is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return text
+        text = render_frame(code, lineno)
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = text
+            self.files.setdefault(code.co_filename, [source_mtime(code.co_filename), time.monotonic(), set()])[2].add(key)
+            if len(self.entries) > self.max_entries:
+                old_key, _ = self.entries.popitem(last=False)
+                self.files[old_key[0].co_filename][2].discard(old_key)
+        return text
+
+    def check_file(self, filename: str, now: float):
+        info = self.files.get(filename)
+        if info is None:
+            self.files[filename] = [source_mtime(filename), now, set()]
+            return
+        if now - info[1] < self.check_interval:
+            return
+        info[1] = now
+        mtime = source_mtime(filename)
+        if mtime != info[0]:
+            info[0] = mtime
+            for key in info[2]:
+                self.entries.pop(key, None)
+            info[2].clear()
+            linecache.checkcache(filename)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.files.clear()
+
+
+frame_cache = FrameCache()  # Shared by every snapshot render
@@ -0,0 +1,231 @@
+import atexit
+import mmap
+import os
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict
+from .records import MAX_ROW_CHARS
+from .report import RECORD_LINE, iter_lines
+
+
+INDEX_BLOCK = 1 << 20  # bytes scanned per step of the background index build
+STRIDE = 64  # one line start kept per STRIDE lines
+MAX_CACHED_LINES = 2048
+COMPRESSED_SUFFIXES = (".gz", ".bz2", ".xz", ".lzma", ".zip")
+
+temp_files = set()  # Decompressed copies not yet removed
+
+
+class LogFileIndex:
+    # Random access to the lines of a log file of any size. The file is mmapped, so only the pages a
+    # lookup touches are read, and every STRIDE-th line start is recorded by build(), normally on a
+    # background thread. Until build() finishes, lines past the indexed part are located from the
+    # average line length, which also gives the estimated line count. Compressed files can't be
+    # mapped: build() first streams them into a temporary plain file, and until then there are no lines.
+    def __init__(self, path: str):
+        self.path = path
+        self.compressed = path.endswith(COMPRESSED_SUFFIXES)
+        self.temp_path = None
+        self.file = None
+        self.size = 0
+        self.data = b""
+        self.starts = array("q", [0])  # start offset of lines 0, STRIDE, 2 * STRIDE...
+        self.lines = 0  # complete lines indexed so far
+        self.indexed = 0  # bytes indexed so far
+        self.unpacked = 0  # characters decompressed so far
+        self.average = 1.0  # bytes per line, refined while indexing
+        self.done = False
+        self.closed = False
+        self.lock = threading.Lock()  # close() against the build thread creating or mapping files
+        if not self.compressed:
+            self.map(path)
+            self.done = self.size == 0
+
+    def map(self, path: str):
+        with self.lock:
+            if self.closed:
+                return
+            self.file = open(path, "rb")
+            size = os.fstat(self.file.fileno()).st_size
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            sample = self.data[:INDEX_BLOCK]
+            self.average = len(sample) / max(sample.count(b"\n"), 1)
+            self.size = size  # Last: readers check size before touching data
+
+    def unpack(self):
+        # Stream a rotated, compressed log into a temporary plain file, counting progress as we go
+        handle, temp_path = tempfile.mkstemp(suffix=".log", prefix="unified-logger-")
+        with self.lock:
+            temp_files.add(temp_path)  # Removed at exit if the index is never closed
+            if self.closed:
+                os.close(handle)
+                remove_temp_file(temp_path)
+                return
+            self.temp_path = temp_path
+        with os.fdopen(handle, "w", encoding="utf-8") as temp_file:
+            for line in iter_lines(self.path):
+                if self.closed:
+                    break
+                temp_file.write(line)
+                self.unpacked += len(line)
+
+    def build(self):
+        try:
+            if self.compressed and self.file is None and not self.closed:
+                self.unpack()
+                if self.temp_path is not None:
+                    self.map(self.temp_path)
+            self.build_blocks()
+        except ValueError:
+            pass  # Closed while indexing
+        self.done = not self.closed
+
+    def build_blocks(self):
+        data, position = self.data, self.indexed
+        while position < self.size and not self.closed:
+            end = min(position + INDEX_BLOCK, self.size)
+            found, lines = [], self.lines
+            newline = data.find(b"\n", position, end)
+            while newline != -1:
+                lines += 1
+                if lines % STRIDE == 0:
+                    found.append(newline + 1)
+                newline = data.find(b"\n", newline + 1, end)
+            self.starts.extend(found)
+            self.lines, self.indexed = lines, end
+            self.average = end / max(lines, 1)
+            position = end
+
+    def start_build(self):
+        thread = threading.Thread(target=self.build, name="unified-logger-index", daemon=True)
+        thread.start()
+        return thread
+
+    def progress(self):
+        # What the build thread is doing, for the tab title; "" once done
+        if self.done or self.closed:
+            return ""
+        if self.size == 0:
+            return f"unpacking, {self.unpacked / (1 << 20):.0f} MB"
+        return f"indexing, {self.indexed * 100 // self.size}%"
+
+    def line_count(self):
+        if self.size == 0:
+            return 0
+        if self.done:
+            trailing = self.data[self.size - 1:self.size] != b"\n"
+            return self.lines + trailing
+        return self.lines + int((self.size - self.indexed) / self.average) + 1
+
+    def line_span(self, number: int):
+        data = self.data
+        lines, indexed = self.lines, self.indexed  # Read once: build() may be updating them
+        if number < lines or self.done:
+            start = self.starts[min(number // STRIDE, len(self.starts) - 1)]
+            for _ in range(number % STRIDE):
+                start = data.find(b"\n", start) + 1
+                if start == 0:
+                    return self.size, self.size
+        else:
+            # Not indexed yet: jump to where the line should be and resynchronize on the next line start
+            offset = min(int(indexed + (number - lines) * self.average), self.size - 1)
+            start = data.find(b"\n", offset - 1) + 1 if offset > 0 else 0
+            if start == 0 and offset > 0:
+                return self.size, self.size
+        end = data.find(b"\n", start)
+        return start, self.size if end == -1 else end
+
+    def line(self, number: int):
+        start, end = self.line_span(number)
+        return self.data[start:end].decode("utf-8", errors="replace").rstrip("\r")
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            if self.size:
+                self.data.close()
+            if self.file is not None:
+                self.file.close()
+            if self.temp_path is not None:
+                remove_temp_file(self.temp_path)
+
+
+def remove_temp_file(path: str):
+    temp_files.discard(path)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def remove_temp_files():
+    for path in list(temp_files):
+        remove_temp_file(path)
+
+
+atexit.register(remove_temp_files)
+
+
+class LogFileStore:
+    # Read-only, RecordStore-like face of a LogFileIndex for the viewers: one row per line, the level
+    # taken from the "{time} [{level}]" prefix of record lines (continuation lines have none)
+    def __init__(self, index: LogFileIndex):
+        self.index = index
+        self.level_names = [""]
+        self.level_ids = {"": 0}
+        self.levels = LineLevels(self)
+        self.cache = OrderedDict()  # row -> (text, level id), for the rows around the viewport
+        self.lock = threading.Lock()  # The Tk thread renders rows while a search worker scans them
+
+    def __len__(self):
+        return self.index.line_count()
+
+    def row(self, row: int):
+        with self.lock:
+            entry = self.cache.get(row)
+            if entry is not None:
+                self.cache.move_to_end(row)
+                return entry
+        text = self.index.line(row)
+        match = RECORD_LINE.match(text)
+        with self.lock:
+            level = self.level_id(match.group(2)) if match else 0
+            entry = self.cache[row] = (text, level)
+            if len(self.cache) > MAX_CACHED_LINES:
+                self.cache.popitem(last=False)
+        return entry
+
+    def level_id(self, name: str):
+        level = self.level_ids.get(name)
+        if level is None:
+            level = self.level_ids[name] = len(self.level_names)
+            self.level_names.append(name)
+        return level
+
+    def level(self, row: int):
+        return self.level_names[self.row(row)[1]]
+
+    def message(self, row: int):
+        return self.row(row)[0]
+
+    def text(self, row: int):
+        return self.row(row)[0]
+
+    def row_text(self, row: int):
+        text = self.row(row)[0]
+        return text[:MAX_ROW_CHARS] + " …" if len(text) > MAX_ROW_CHARS else text
+
+    def refresh(self):
+        # Rows move once the index replaces estimates with exact line starts
+        with self.lock:
+            self.cache.clear()
+
+
+class LineLevels:
+    # store.levels[row] for a LogFileStore, parsed on access
+    def __init__(self, store: LogFileStore):
+        self.store = store
+
+    def __getitem__(self, row: int):
+        return self.store.row(row)[1]
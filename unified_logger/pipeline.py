@@ -0,0 +1,412 @@
+import atexit
+import json
+import os
+import signal
+import threading
+import time
+import weakref
+from collections import deque, namedtuple
+from datetime import datetime
+from loguru._logger import Core, Logger
+from .frames import ExceptionSnapshot, capped_payload
+
+
+BACKPRESSURE_POLICIES = ("block", "drop_oldest", "drop_newest", "spill")
+SHUTDOWN_TIMEOUT = 5.0
+FORK_LOCK_TIMEOUT = 1.0
+
+live_loggers = weakref.WeakSet()  # Instances to flush at interpreter exit or on SIGTERM
+live_sinks = weakref.WeakSet()  # Queued sinks whose threads and locks must be rebuilt after fork
+shutdown_hooks = {"installed": False, "previous": {}}
+SpilledLevel = namedtuple("SpilledLevel", "name no icon")
+
+
+def new_pipeline():
+    # Build a logger with its own handler core, the same way loguru builds the global one.
+    # Records logged through it only reach the sinks added to it. Logger's arguments are private
+    # and change between loguru versions (patchers= arrived in 0.7), hence the pin in setup.py;
+    # deep-copying the global logger instead would copy its handlers, and stderr can't be copied.
+    return Logger(
+        core=Core(),
+        exception=None,
+        depth=0,
+        record=False,
+        lazy=False,
+        colors=False,
+        raw=False,
+        capture=True,
+        patchers=[],
+        extra={},
+    )
+
+
+class QueuedSink:
+    # Bounded queue in front of a slow sink. The caller only pays for an append;
+    # a worker thread delivers records, and `policy` decides what happens when the queue is full.
+    def __init__(self, sink, max_queue: int = 10000, policy: str = "block", spill_path: str = None, per_child_files: bool = False,
+                 serializer=None):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Invalid backpressure policy: {policy}")
+        if policy == "spill" and spill_path is None:
+            raise ValueError("The spill policy requires a spill_path")
+        self.sink = sink
+        self.max_queue = max_queue
+        self.policy = policy
+        self.spill_path = spill_path
+        self.per_child_files = per_child_files
+        self.serializer = serializer  # Turns a record into output text on the worker thread; default renders tracebacks
+        self.stream = None
+        self.writer, self.flusher = self.resolve_writer(sink)
+        self.queue = deque()
+        self.cond = threading.Condition()
+        self.write_lock = threading.Lock()  # Held by the worker while delivering, so fork never splits a write
+        self.fork_locks = ()
+        self.counters = {"enqueued": 0, "delivered": 0, "dropped": 0, "spilled": 0, "errors": 0, "high_watermark": 0}
+        self.spill_pending = 0
+        self.in_flight = 0
+        self.closed = False
+        self.start_worker()
+        live_sinks.add(self)
+
+    def start_worker(self):
+        self.worker = threading.Thread(target=self.run, name="UnifiedLogger-sink", daemon=True)
+        self.worker.start()
+
+    def resolve_writer(self, sink):
+        if isinstance(sink, (str, os.PathLike)):
+            self.stream = open(sink, "a", encoding="utf-8")  # Owned by this sink, closed with it
+            return self.stream.write, self.stream.flush
+        if hasattr(sink, "write"):
+            return sink.write, getattr(sink, "flush", None)
+        if callable(sink):
+            return sink, None
+        raise TypeError(f"Cannot use {sink!r} as a sink")
+
+    def __call__(self, message):
+        with self.cond:
+            if self.closed:
+                self.counters["dropped"] += 1
+                return
+            if len(self.queue) >= self.max_queue:
+                if self.policy == "block":
+                    while len(self.queue) >= self.max_queue and not self.closed:
+                        self.cond.wait()
+                    if self.closed:
+                        self.counters["dropped"] += 1
+                        return
+                elif self.policy == "drop_oldest":
+                    self.queue.popleft()
+                    self.counters["dropped"] += 1
+                elif self.policy == "drop_newest":
+                    self.counters["dropped"] += 1
+                    return
+                else:
+                    self.spill(message)
+                    return
+            if self.spill_pending:
+                self.spill(message)  # Behind older spilled records, so the sink sees them in order
+                return
+            self.queue.append(message)
+            self.counters["enqueued"] += 1
+            if len(self.queue) > self.counters["high_watermark"]:
+                self.counters["high_watermark"] = len(self.queue)
+            self.cond.notify_all()
+
+    def spill(self, message):
+        # Called with the lock held. One JSON object per line: the output text, already rendered or
+        # serialized since a snapshot can't be written to disk, and the record fields callable sinks
+        # read, rebuilt on replay as a SpilledMessage.
+        entry = {"text": self.serializer(message) if self.serializer is not None else render_message(message),
+                 "serialized": self.serializer is not None}
+        record = getattr(message, "record", None)
+        if record is not None:
+            entry["record"] = spill_fields(record)
+        with open(self.spill_path, "a", encoding="utf-8") as spill_file:
+            spill_file.write(json.dumps(entry, default=str) + "\n")
+        self.spill_pending += 1
+        self.counters["spilled"] += 1
+        self.cond.notify_all()
+
+    def take_spill(self):
+        # Move the spill file aside under the lock so producers can keep spilling while we replay
+        replay_path = self.spill_path + ".replay"
+        os.replace(self.spill_path, replay_path)
+        self.spill_pending = 0
+        return replay_path
+
+    def replay_spill(self, replay_path):
+        with open(replay_path, encoding="utf-8") as replay_file:
+            for line in replay_file:
+                self.in_flight += 1
+                self.deliver(spilled_message(json.loads(line)))
+        os.remove(replay_path)
+
+    def deliver(self, message):
+        try:
+            if isinstance(message, SpilledMessage):
+                pass  # Rendered or serialized before it was spilled
+            elif self.serializer is not None:
+                message = self.serializer(message)
+            else:
+                message = render_message(message)  # Tracebacks rendered here, off the thread that raised
+            self.writer(message)
+            self.counters["delivered"] += 1
+        except Exception:
+            self.counters["errors"] += 1
+        finally:
+            self.in_flight -= 1
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.spill_pending and not self.closed:
+                    self.cond.wait()
+                if not self.queue and not self.spill_pending:
+                    return
+                batch = list(self.queue)
+                self.queue.clear()
+                self.in_flight = len(batch)
+                # Queued records are older than spilled ones: new records go to the spill file while
+                # one is pending, so it's replayed once the queue is empty
+                replay_path = self.take_spill() if self.spill_pending and not batch else None
+                self.cond.notify_all()  # Wake producers blocked on a full queue
+            with self.write_lock:
+                for message in batch:
+                    self.deliver(message)
+                if replay_path is not None:
+                    self.replay_spill(replay_path)
+                self.flush_writer()
+
+    def flush_writer(self):
+        if self.flusher is not None:
+            try:
+                self.flusher()
+            except Exception:
+                self.counters["errors"] += 1
+
+    def close(self, timeout: float = SHUTDOWN_TIMEOUT):
+        # Stop accepting records, let the worker drain until the deadline and report what is left
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.worker.join(max(timeout, 0))
+        if self.worker.is_alive():
+            with self.cond:
+                return len(self.queue) + self.spill_pending + self.in_flight
+        if self.stream is not None:
+            self.stream.close()
+        return 0
+
+    def before_fork(self):
+        # Quiesce the worker so the child doesn't inherit a half-written record or buffered data
+        # it would flush a second time. A hung sink only delays fork by FORK_LOCK_TIMEOUT.
+        locks = []
+        if self.write_lock.acquire(timeout=FORK_LOCK_TIMEOUT):
+            locks.append(self.write_lock)
+            self.flush_writer()
+        if self.cond.acquire(timeout=FORK_LOCK_TIMEOUT):
+            locks.append(self.cond)
+        self.fork_locks = tuple(locks)
+
+    def after_fork_in_parent(self):
+        for lock in reversed(self.fork_locks):
+            lock.release()
+        self.fork_locks = ()
+
+    def after_fork_in_child(self):
+        # Only the forking thread survives: rebuild locks and the worker. Queued records belong to the parent.
+        self.cond = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.fork_locks = ()
+        self.queue = deque()
+        self.in_flight = 0
+        self.spill_pending = 0
+        if self.spill_path is not None:
+            self.spill_path = child_path(self.spill_path)
+        if self.per_child_files and isinstance(self.sink, (str, os.PathLike)):
+            self.sink = child_path(os.fspath(self.sink))
+            self.writer, self.flusher = self.resolve_writer(self.sink)
+        if not self.closed:
+            self.start_worker()
+
+    def stats(self):
+        with self.cond:
+            stats = dict(self.counters)
+            stats["queued"] = len(self.queue)
+            stats["policy"] = self.policy
+            return stats
+
+
+class JsonSerializer:
+    # One JSON object per record, exception included as structured data. Each line is held to
+    # max_bytes: the exception payload gets what the rest of the record leaves, then the message is cut.
+    def __init__(self, max_bytes: int = 16384):
+        self.max_bytes = max_bytes
+
+    def __call__(self, message):
+        record = getattr(message, "record", None)
+        if record is None:
+            payload = {"message": str(message).rstrip("\n")}  # Not a loguru message
+        else:
+            payload = {
+                "time": record["time"].isoformat(),
+                "level": record["level"].name,
+                "message": record["message"],
+                "module": record["name"],
+                "function": record["function"],
+                "line": record["line"],
+            }
+            for key in ("fingerprint", "task"):
+                if record["extra"].get(key) is not None:
+                    payload[key] = record["extra"][key]
+            if len(json.dumps(payload, default=str)) > self.max_bytes // 2:
+                payload["message"] = payload["message"][:self.max_bytes // 4]  # Leave room for the exception
+                payload["truncated"] = True
+            snapshot = deferred_traceback(message)
+            if snapshot is None and record["exception"] is not None and record["exception"].value is not None:
+                snapshot = ExceptionSnapshot.capture(record["exception"].value)  # Plain logger.exception() calls
+            if snapshot is not None:
+                remaining = self.max_bytes - len(json.dumps(payload, default=str)) - len(', "exception": ')
+                payload["exception"] = capped_payload(snapshot, remaining)
+        line = json.dumps(payload, default=str)
+        if len(line.encode("utf-8")) > self.max_bytes:
+            payload.pop("exception", None)
+            payload["truncated"] = True
+            line = self.shrink(payload)
+        return line + "\n"
+
+    def shrink(self, payload: dict):
+        # Cut the longest text field until the encoded line fits; serialized JSON is never sliced.
+        # The cut is scaled by the field's bytes per character, as escapes make "é" 6 bytes.
+        while True:
+            line = json.dumps(payload, default=str)
+            excess = len(line.encode("utf-8")) - self.max_bytes
+            texts = [key for key, value in payload.items() if isinstance(value, str) and value]
+            if excess <= 0:
+                return line
+            if texts:
+                key = max(texts, key=lambda key: len(json.dumps(payload[key])))
+                value = payload[key]
+                size = len(json.dumps(value).encode("utf-8"))
+                payload[key] = value[:min(len(value) * max(size - excess, 0) // size, len(value) - 1)]
+                continue
+            others = [key for key in payload if key != "truncated"]
+            if not others:
+                return line  # max_bytes is below the smallest possible record
+            del payload[max(others, key=lambda key: len(json.dumps(payload[key], default=str)))]
+
+
+class SpilledMessage(str):
+    # A record read back from a spill file: its output text, and in `record` the fields of the
+    # original loguru record that survive JSON (time, level, message, name, function, line, extra).
+    # extra["traceback"] holds the rendered text instead of the snapshot.
+    record = None
+
+
+def render_message(message):
+    snapshot = deferred_traceback(message)
+    if snapshot is None:
+        return message
+    return f"{message}{snapshot.render()}\n"
+
+
+def spill_fields(record):
+    extra = dict(record["extra"])
+    if extra.get("traceback") is not None:
+        extra["traceback"] = extra["traceback"].render()
+    level = record["level"]
+    return {
+        "time": record["time"].isoformat(),
+        "level": [level.name, level.no, level.icon],
+        "message": record["message"],
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "extra": extra,
+    }
+
+
+def spilled_message(entry: dict):
+    message = SpilledMessage(entry["text"])
+    fields = entry.get("record")
+    if fields is not None:
+        message.record = dict(fields, time=datetime.fromisoformat(fields["time"]), level=SpilledLevel(*fields["level"]),
+                              exception=None)
+    return message
+
+
+def deferred_traceback(message):
+    # Traceback snapshot attached with logger.bind(traceback=...), if the record carries one
+    record = getattr(message, "record", None)
+    if record is None:
+        return None
+    return record["extra"].get("traceback")
+
+
+def child_path(path: str):
+    root, ext = os.path.splitext(path)
+    return f"{root}-{os.getpid()}{ext}"
+
+
+def run_with_deadline(func, timeout: float):
+    # Run func on a helper thread so a hung sink can't hold up shutdown past the deadline
+    helper = threading.Thread(target=func, name="UnifiedLogger-close", daemon=True)
+    try:
+        helper.start()
+    except RuntimeError:
+        func()  # Late in interpreter shutdown new threads are refused; close inline instead
+        return True
+    helper.join(max(timeout, 0))
+    return not helper.is_alive()
+
+
+def close_all(timeout: float = SHUTDOWN_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    return {id(unified_logger): unified_logger.close(timeout=deadline - time.monotonic()) for unified_logger in list(live_loggers)}
+
+
+def handle_shutdown_signal(signum, frame):
+    close_all()
+    previous = shutdown_hooks["previous"].get(signum, signal.SIG_DFL)
+    if callable(previous):
+        previous(signum, frame)
+    elif previous == signal.SIG_DFL:
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+
+
+def register_for_shutdown(unified_logger, signals=(signal.SIGTERM,)):
+    live_loggers.add(unified_logger)
+    if shutdown_hooks["installed"]:
+        return
+    shutdown_hooks["installed"] = True
+    atexit.register(close_all)
+    if threading.current_thread() is not threading.main_thread():
+        return  # Signal handlers can only be installed from the main thread
+    for signum in signals:
+        previous = signal.getsignal(signum)
+        if previous == signal.SIG_IGN:
+            continue
+        shutdown_hooks["previous"][signum] = previous
+        signal.signal(signum, handle_shutdown_signal)
+
+
+def before_fork():
+    for queued in list(live_sinks):
+        queued.before_fork()
+
+
+def after_fork_in_parent():
+    for queued in list(live_sinks):
+        queued.after_fork_in_parent()
+
+
+def after_fork_in_child():
+    for queued in list(live_sinks):
+        queued.after_fork_in_child()
+    for unified_logger in list(live_loggers):
+        unified_logger.after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=before_fork, after_in_parent=after_fork_in_parent, after_in_child=after_fork_in_child)
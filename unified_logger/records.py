@@ -0,0 +1,330 @@
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime
+from .report import RECORD_LINE
+
+
+MAX_ROW_CHARS = 300
+SCROLLBACK = 100000
+MAX_ROWS = 1000000  # rows kept at all; about 46 bytes each in the columns, postings and buckets
+PAGE_ROWS = 256
+MAX_PAGES = 16
+NOT_LOADED = "[record no longer in memory and not found in the log file]"
+FACETS = ("level", "module", "site", "stream")
+LIVE_STREAM = "live"  # Records from this instance's own pipeline
+ERROR_LEVELS = ("ERROR", "CRITICAL")
+LEVEL_ORDER = ["TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"]
+TABLE_COLUMNS = (("time", 12), ("level", 8), ("source", 12), ("message", 0))  # (name, width in characters)
+
+
+class RecordStore:
+    # Viewer records kept column by column: timestamps, level/module/call-site ids and log file offsets
+    # in typed arrays, which are kept for every row, and message strings in a ring of the newest
+    # `capacity` rows. Older messages are read back from the log file a page at a time when scrolled to.
+    # Each level, module, call site and stream (the pipeline or a remote source) also has a list of
+    # its rows, kept up to date on append, so counting or filtering by one never scans the store.
+    # Past `max_rows`, compact() drops the oldest quarter of the rows and renumbers the rest.
+    def __init__(self, capacity: int = SCROLLBACK, max_rows: int = MAX_ROWS):
+        self.capacity = capacity
+        self.max_rows = max(max_rows, capacity)
+        self.dropped = 0  # rows dropped by compact() so far
+        self.times = array("d")
+        self.levels = array("B")
+        self.modules = array("I")
+        self.sites = array("I")  # "module:function:line"
+        self.streams = array("I")
+        self.columns = {"level": self.levels, "module": self.modules, "site": self.sites, "stream": self.streams}
+        self.offsets = array("q")  # log file size when the record arrived, -1 if unknown
+        self.messages = []  # row % capacity -> message once full
+        self.sources = []  # [first row, path, inode]: which log file the following rows went to
+        self.pages = OrderedDict()  # page number -> {row: message} read back from disk
+        self.page_lock = threading.Lock()  # The search worker reads old rows too
+        self.names = {facet: [] for facet in FACETS}  # facet -> id -> name
+        self.ids = {facet: {} for facet in FACETS}
+        self.postings = {facet: [] for facet in FACETS}  # facet -> id -> array of rows
+        self.level_names = self.names["level"]
+        self.level_ids = self.ids["level"]
+        # Per-second buckets: the second, its first row, and running totals of records and errors up
+        # to and including it. Counts between two times are a difference of totals.
+        self.seconds = array("q")
+        self.second_rows = array("I")
+        self.total_counts = array("I")
+        self.error_counts = array("I")
+
+    def __len__(self):
+        return len(self.times)
+
+    def intern(self, facet: str, name: str):
+        ids = self.ids[facet]
+        value = ids.get(name)
+        if value is None:
+            value = ids[name] = len(self.names[facet])
+            self.names[facet].append(name)
+            self.postings[facet].append(array("I"))
+        return value
+
+    def level_id(self, name: str):
+        return self.intern("level", name)
+
+    def append(self, timestamp: float, level: str, message: str, offset: int = -1, source: tuple = None,
+               module: str = "", site: str = "", stream: str = LIVE_STREAM):
+        # source is (log file path, inode); a new one starts a segment, e.g. after rotation or set_level
+        row = len(self.times)
+        self.times.append(timestamp)
+        for facet, name in (("level", level), ("module", module), ("site", site), ("stream", stream)):
+            value = self.intern(facet, name)
+            self.columns[facet].append(value)
+            self.postings[facet][value].append(row)
+        self.offsets.append(offset)
+        self.count_second(int(timestamp), row, level in ERROR_LEVELS)
+        if source is not None and (not self.sources or tuple(self.sources[-1][1:]) != source):
+            self.sources.append([row, *source])
+        if len(self.messages) < self.capacity:
+            self.messages.append(message)
+        else:
+            self.messages[row % self.capacity] = message
+        return row
+
+    def compact(self):
+        # Drop the oldest rows once there are more than max_rows, keeping at least the in-memory
+        # messages, and renumber the rest from 0. Row numbers held elsewhere (views, viewers) must be
+        # moved down by the returned count. Runs on the thread that appends.
+        total = len(self.times)
+        if total <= self.max_rows:
+            return 0
+        count = total - max(self.max_rows - self.max_rows // 4, self.capacity)
+        shift = count % self.capacity
+        self.messages[:] = self.messages[shift:] + self.messages[:shift]  # Row r was at (r + count) % capacity
+        self.drop_buckets(count)
+        for facet in FACETS:
+            # New arrays rather than in place: a FacetView sharing a list picks up the new one in drop()
+            self.postings[facet] = [shift_rows(rows, count) for rows in self.postings[facet]]
+        for column in (self.times, self.offsets, *self.columns.values()):
+            del column[:count]
+        index = max(bisect_right([source[0] for source in self.sources], count) - 1, 0)
+        self.sources = [[max(start - count, 0), path, inode] for start, path, inode in self.sources[index:]]
+        with self.page_lock:
+            self.pages.clear()
+        self.dropped += count
+        return count
+
+    def drop_buckets(self, count: int):
+        # Per-second buckets of rows that stay, totals restarted from the first of them. Called
+        # before the columns are cut, to count errors among dropped rows sharing a bucket with kept ones.
+        index = bisect_right(self.second_rows, count) - 1
+        total = self.total_counts[index - 1] if index else 0
+        errors = self.error_counts[index - 1] if index else 0
+        error_ids = {self.level_ids[name] for name in ERROR_LEVELS if name in self.level_ids}
+        for row in range(self.second_rows[index], count):
+            total += 1
+            errors += self.levels[row] in error_ids
+        self.seconds = self.seconds[index:]
+        self.second_rows = array("I", [max(row - count, 0) for row in self.second_rows[index:]])
+        self.total_counts = array("I", [max(value - total, 0) for value in self.total_counts[index:]])
+        self.error_counts = array("I", [max(value - errors, 0) for value in self.error_counts[index:]])
+
+    def in_memory(self, row: int):
+        return row >= len(self.times) - self.capacity
+
+    def message(self, row: int):
+        if self.in_memory(row):
+            return self.messages[row % self.capacity]
+        number = row // PAGE_ROWS
+        with self.page_lock:
+            page = self.pages.get(number)
+            if page is None:
+                first = number * PAGE_ROWS
+                page = self.pages[number] = self.reload(first, min(first + PAGE_ROWS, len(self.times) - self.capacity))
+                if len(self.pages) > MAX_PAGES:
+                    self.pages.popitem(last=False)
+            else:
+                self.pages.move_to_end(number)
+        return page.get(row, NOT_LOADED)
+
+    def reload(self, first: int, last: int):
+        # Only the pipeline's own rows went to the log file; rows of other streams in between have
+        # no file offset and their own clocks, so they are left out of the pairing
+        found = {}
+        live = self.ids["stream"].get(LIVE_STREAM)
+        if live is None:
+            return found
+        live_rows = self.postings["stream"][live]
+        starts = [source[0] for source in self.sources]
+        row = first
+        while row < last:
+            index = bisect_right(starts, row) - 1
+            if index < 0:
+                row = starts[0] if starts else last  # Rows from before any known log file
+                continue
+            start, path, inode = self.sources[index]
+            end = min(last, starts[index + 1]) if index + 1 < len(starts) else last
+            path = locate(path, inode)
+            if path is not None:
+                # The size seen after the previous live row is where this one starts, give or take other threads
+                position = bisect_left(live_rows, row)
+                lowest, previous = bisect_left(live_rows, start), position - 1
+                while previous >= lowest and self.offsets[live_rows[previous]] < 0:
+                    previous -= 1
+                offset = self.offsets[live_rows[previous]] if previous >= lowest else 0
+                rows = live_rows[position:bisect_left(live_rows, end)]
+                found.update(self.match(read_records(path, offset), rows))
+            row = end
+        return found
+
+    def match(self, records, rows):
+        # Pair records read from disk with live rows by time and level. Rows the file never got (below
+        # the file sink's level, say) are skipped once the file has moved past their time.
+        found = {}
+        position = 0
+        for timestamp, level, text in records:
+            while position < len(rows) and timestamp > self.times[rows[position]] + 1e-6:
+                position += 1
+            if position >= len(rows):
+                break
+            row = rows[position]
+            if abs(timestamp - self.times[row]) <= 1e-6 and level == self.level(row):
+                found[row] = text
+                position += 1
+        return found
+
+    def level(self, row: int):
+        return self.level_names[self.levels[row]]
+
+    def count_second(self, second: int, row: int, error: bool):
+        if not self.seconds or second > self.seconds[-1]:
+            self.seconds.append(second)
+            self.second_rows.append(row)
+            self.total_counts.append((self.total_counts[-1] if self.total_counts else 0) + 1)
+            self.error_counts.append((self.error_counts[-1] if self.error_counts else 0) + error)
+        else:
+            # Out-of-order timestamps (another thread, a clock step) count toward the latest second
+            self.total_counts[-1] += 1
+            self.error_counts[-1] += error
+
+    def totals_before(self, timestamp: float):
+        # (records, errors) in seconds before `timestamp`
+        index = bisect_left(self.seconds, timestamp)
+        if index == 0:
+            return 0, 0
+        return self.total_counts[index - 1], self.error_counts[index - 1]
+
+    def density(self, start: float, end: float, slots: int):
+        # (records, errors) per equal time slice of [start, end)
+        step = (end - start) / slots
+        previous = self.totals_before(start)
+        result = []
+        for slot in range(1, slots + 1):
+            current = self.totals_before(start + slot * step)
+            result.append((current[0] - previous[0], current[1] - previous[1]))
+            previous = current
+        return result
+
+    def row_at_time(self, timestamp: float):
+        index = bisect_right(self.seconds, int(timestamp)) - 1
+        return self.second_rows[max(index, 0)] if self.seconds else 0
+
+    def facet_counts(self, facet: str):
+        return [(name, len(rows)) for name, rows in zip(self.names[facet], self.postings[facet])]
+
+    def text(self, row: int):
+        stamp = datetime.fromtimestamp(self.times[row]).strftime("%H:%M:%S.%f")[:-3]
+        return f"{stamp} {self.level(row):<8} {self.message(row)}"
+
+    def row_text(self, row: int):
+        return clip_line(self.text(row))
+
+    def table_text(self, row: int):
+        # A row of the table mode, padded to TABLE_COLUMNS for a fixed-width font
+        stamp = datetime.fromtimestamp(self.times[row]).strftime("%H:%M:%S.%f")[:-3]
+        source = self.names["stream"][self.streams[row]][:TABLE_COLUMNS[2][1]]
+        return clip_line(f"{stamp:<12} {self.level(row):<8} {source:<12} {self.message(row)}")
+
+
+def shift_rows(rows, count: int):
+    # A row list in store order without its rows below `count`, renumbered for a compacted store
+    return array("I", [row - count for row in rows[bisect_left(rows, count):]])
+
+
+def clip_line(text: str):
+    # One display line: the first line of the text, clipped, with a marker when there is more
+    line, newline, _ = text.partition("\n")
+    if len(line) > MAX_ROW_CHARS:
+        return line[:MAX_ROW_CHARS] + " …"
+    return line + " …" if newline else line
+
+
+class FacetView:
+    # Rows having every selected (facet, value id). One facet shares the store's row list, which grows
+    # as records arrive; several are intersected starting from the shortest list, and new arrivals are
+    # then checked by add_live like a FilterView.
+    def __init__(self, store: RecordStore, selection: dict):
+        self.selection = dict(selection)
+        facet, value = min(self.selection.items(), key=lambda item: len(store.postings[item[0]][item[1]]))
+        rows = store.postings[facet][value]
+        self.shared = len(self.selection) == 1
+        self.rows = rows if self.shared else array("I", [row for row in rows if self.matches(store, row)])
+        self.done = True
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, position: int):
+        return self.rows[position]
+
+    def matches(self, store: RecordStore, row: int):
+        return all(store.columns[facet][row] == value for facet, value in self.selection.items())
+
+    def add_live(self, store: RecordStore, row: int):
+        if not self.shared and self.matches(store, row):
+            self.rows.append(row)
+
+    def drop(self, store: RecordStore, count: int):
+        # After store.compact() dropped `count` rows: renumber, and return how many of ours went
+        before = len(self.rows)
+        if self.shared:
+            facet, value = next(iter(self.selection.items()))
+            self.rows = store.postings[facet][value]
+        else:
+            self.rows = shift_rows(self.rows, count)
+        return before - len(self.rows)
+
+
+def locate(path: str, inode: int):
+    # After rotation the file we wrote to has been renamed; find it by inode among its siblings
+    try:
+        if os.stat(path).st_ino == inode:
+            return path
+        folder = os.path.dirname(path) or "."
+        for entry in os.scandir(folder):
+            if entry.is_file() and entry.inode() == inode:
+                return entry.path
+    except OSError:
+        pass
+    return None
+
+
+def read_records(path: str, offset: int):
+    # (timestamp, level, text) for each "{time} [{level}] {message}" record from `offset` on.
+    # Lines before the first record line (the tail of a record cut by the seek) are skipped.
+    record = None
+    with open(path, "rb") as log_file:
+        log_file.seek(offset)
+        for raw in log_file:
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            match = RECORD_LINE.match(line)
+            if match:
+                if record is not None:
+                    yield record[0], record[1], "\n".join(record[2]).rstrip()
+                try:
+                    timestamp = datetime.strptime(match.group(1), "%Y-%m-%dT%H:%M:%S.%f%z").timestamp()
+                except ValueError:
+                    record = None  # Not the default time format; can't be matched to a row
+                    continue
+                record = [timestamp, match.group(2), [match.group(3)]]
+            elif record is not None:
+                record[2].append(line)
+    if record is not None:
+        yield record[0], record[1], "\n".join(record[2]).rstrip()
@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+
+class RenderCache:
+    # Rendering resources for the viewer, least recently used evicted first. Keys hold everything the
+    # value depends on, so a hit is always valid for the current theme and font; invalidate() drops
+    # everything when either changes.
+    def __init__(self, max_images: int = 256, max_wraps: int = 50000):
+        self.max_images = max_images
+        self.max_wraps = max_wraps
+        self.images = OrderedDict()  # (icon, color, height) -> PhotoImage
+        self.metrics = {}  # font description -> font.metrics()
+        self.wraps = OrderedDict()  # (text hash, width, font) -> height in pixels
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, entries: OrderedDict, key, make, limit: int):
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = entries[key] = make()
+        if len(entries) > limit:
+            entries.popitem(last=False)
+        return value
+
+    def image(self, icon: str, color: str, height: int, make):
+        # make(icon, color, height) rasterizes the SVG, e.g. tkfontawesome.icon_to_image
+        return self.lookup(self.images, (icon, color, height),
+                           lambda: make(icon, fill=color, scale_to_height=height), self.max_images)
+
+    def font_metrics(self, font: str, make):
+        # make() builds the tkf.Font; only done once per font description
+        metrics = self.metrics.get(font)
+        if metrics is None:
+            self.misses += 1
+            metrics = self.metrics[font] = make().metrics()
+        else:
+            self.hits += 1
+        return metrics
+
+    def wrap_height(self, text: str, width: int, font: str, measure):
+        # measure() lays the text out at `width` and returns its height
+        return self.lookup(self.wraps, (hash(text), width, font), measure, self.max_wraps)
+
+    def invalidate(self):
+        self.images.clear()
+        self.metrics.clear()
+        self.wraps.clear()
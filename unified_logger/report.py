@@ -0,0 +1,190 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from .fingerprint import fingerprint_key
+
+
+LOG_SUFFIXES = (".log", ".gz", ".bz2", ".xz", ".lzma", ".zip")
+CACHE_FILE = ".errors-cache.json"
+
+# A record starts with "{time} [{level}] {message}", the format init_loguru writes
+RECORD_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2}T[\d:.]+(?:[+-]\d{4}|Z)?) \[(\w+)\] (.*)$")
+FINGERPRINT_TAG = re.compile(r"(?:Exception|Custom Traceback) \[([0-9a-f]{12})\]")
+REPEAT_LINE = re.compile(r"Exception \[([0-9a-f]{12})\] repeated \((\d+) total\): (.*)$")
+FRAME_LINE = re.compile(r'^  File "(.+)", line (\d+), in (.+)$')
+TRACEBACK_HEADER = "Traceback (most recent call last):"
+
+
+def iter_lines(path: str):
+    # Rotated files may have been compressed by loguru; every format is streamed, never fully loaded
+    if path.endswith(".gz"):
+        opener = gzip.open
+    elif path.endswith(".bz2"):
+        opener = bz2.open
+    elif path.endswith((".xz", ".lzma")):
+        opener = lzma.open
+    elif path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                with archive.open(name) as member:
+                    yield from io.TextIOWrapper(member, encoding="utf-8", errors="replace")
+        return
+    else:
+        opener = open
+    with opener(path, "rt", encoding="utf-8", errors="replace") as log_file:
+        yield from log_file
+
+
+def text_fingerprint(body: list):
+    # Fingerprint a printed traceback the same way fingerprint() does a live one: the type from the
+    # last line and the frames of the last (outermost) traceback section
+    start = max(i for i, line in enumerate(body) if line.startswith(TRACEBACK_HEADER))
+    frames = []
+    for line in body[start + 1:]:
+        match = FRAME_LINE.match(line)
+        if match:
+            frames.append((os.path.normcase(match.group(1)), match.group(3), int(match.group(2))))
+    return fingerprint_key(exception_line(body).split(":", 1)[0], tuple(frames))
+
+
+def exception_line(body: list):
+    for line in reversed(body):
+        if line and not line[0].isspace():
+            return line
+    return ""
+
+
+def add_occurrence(groups: dict, fp: str, seen: str, summary: str, sample: str = None):
+    group = groups.get(fp)
+    if group is None:
+        group = groups[fp] = {"count": 0, "first_seen": seen, "last_seen": seen, "summary": summary, "sample": None}
+    group["count"] += 1
+    group["first_seen"] = min(group["first_seen"], seen)
+    group["last_seen"] = max(group["last_seen"], seen)
+    if group["sample"] is None and sample is not None:
+        group["sample"] = sample
+
+
+def finish_block(block, groups: dict, previous=None):
+    # Counts the block's exception, if any, and returns what it was: ("exception" or "custom",
+    # fingerprint) or ("repeat", fingerprint, total). log_exception and custom_traceback on one
+    # exception write an "Exception" block then a "Custom Traceback" one, which count once; so do
+    # duplicate reference lines written by older versions. Other records leave `previous` as it is.
+    if block is None:
+        return previous
+    seen, head, body = block
+    repeat = REPEAT_LINE.search(head)
+    if repeat:
+        kind = ("repeat", repeat.group(1), repeat.group(2))
+        if kind != previous:
+            add_occurrence(groups, repeat.group(1), seen, repeat.group(3))
+        return kind
+    if not any(line.startswith(TRACEBACK_HEADER) for line in body):
+        return previous
+    tag = FINGERPRINT_TAG.search(head)
+    fp = tag.group(1) if tag else text_fingerprint(body)
+    kind = ("custom" if tag and tag.group(0).startswith("Custom") else "exception", fp)
+    if kind[0] == "custom" and previous == ("exception", fp):
+        return kind  # The same exception's second entry
+    add_occurrence(groups, fp, seen, exception_line(body), "\n".join([head] + body).rstrip())
+    return kind
+
+
+def scan_file(path: str):
+    groups = {}
+    block = None  # [time, record line, following lines]
+    previous = None  # what the last exception entry was, see finish_block
+    for line in iter_lines(path):
+        line = line.rstrip("\n")
+        match = RECORD_LINE.match(line)
+        if match:
+            previous = finish_block(block, groups, previous)
+            block = [match.group(1), line, []]
+        elif block is not None:
+            block[2].append(line)
+    finish_block(block, groups, previous)
+    return groups
+
+
+def log_files(log_folder: str):
+    # Active logs plus rotated and compressed siblings
+    names = sorted(name for name in os.listdir(log_folder) if ".log" in name and name.endswith(LOG_SUFFIXES))
+    return [os.path.join(log_folder, name) for name in names]
+
+
+def load_cache(cache_path: str):
+    try:
+        with open(cache_path, encoding="utf-8") as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache_path: str, cache: dict):
+    try:
+        with open(cache_path, "w", encoding="utf-8") as cache_file:
+            json.dump(cache, cache_file)
+    except OSError:
+        pass  # A read-only log folder only costs a rescan next time
+
+
+def collect_errors(log_folder: str = "logs", workers: int = None, use_cache: bool = True):
+    # Per-file results are cached by (size, mtime), so only new or growing files are rescanned
+    cache_path = os.path.join(log_folder, CACHE_FILE)
+    cache = load_cache(cache_path) if use_cache else {}
+    results, stale = {}, []
+    for path in log_files(log_folder):
+        stat = os.stat(path)
+        entry = cache.get(path)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            results[path] = entry["groups"]
+        else:
+            stale.append((path, stat))
+    if len(stale) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scanned = list(pool.map(scan_file, [path for path, _ in stale]))
+    else:
+        scanned = [scan_file(path) for path, _ in stale]
+    for (path, stat), groups in zip(stale, scanned):
+        results[path] = groups
+        cache[path] = {"size": stat.st_size, "mtime": stat.st_mtime, "groups": groups}
+    if use_cache and stale:
+        save_cache(cache_path, {path: cache[path] for path in results})
+    return merge_groups(results.values())
+
+
+def merge_groups(per_file):
+    merged = {}
+    for groups in per_file:
+        for fp, group in groups.items():
+            total = merged.get(fp)
+            if total is None:
+                merged[fp] = dict(group)
+                continue
+            total["count"] += group["count"]
+            if group["sample"] is not None and (total["sample"] is None or group["first_seen"] < total["first_seen"]):
+                total["sample"] = group["sample"]  # Keep the earliest trace as the sample
+            total["first_seen"] = min(total["first_seen"], group["first_seen"])
+            total["last_seen"] = max(total["last_seen"], group["last_seen"])
+    return merged
+
+
+def format_report(groups: dict, top: int = 20, samples: int = 3):
+    ranked = sorted(groups.items(), key=lambda item: item[1]["count"], reverse=True)[:top]
+    if not ranked:
+        return "No exceptions found."
+    lines = [f"{'COUNT':>7}  {'FIRST SEEN':<32}  {'LAST SEEN':<32}  {'FINGERPRINT':<12}  EXCEPTION"]
+    for fp, group in ranked:
+        lines.append(f"{group['count']:>7}  {group['first_seen']:<32}  {group['last_seen']:<32}  {fp:<12}  {group['summary']}")
+    for fp, group in ranked[:samples]:
+        if group["sample"]:
+            lines.append("")
+            lines.append(f"--- {fp} ({group['count']} occurrences) ---")
+            lines.append(group["sample"])
+    return "\n".join(lines)
@@ -0,0 +1,125 @@
+import reprlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+# Cache keys are built from these: immutable values and containers that are immutable as long as
+# their items are. Floats are left out, as 0.0 == -0.0 but their reprs differ.
+KEY_ATOMS = (int, bool, str, bytes, type(None))
+KEY_CONTAINERS = (tuple, frozenset)
+MAX_KEY_BYTES = 4096  # a cache key never keeps more than this alive
+# reprlib sorts every key of these before taking the first few, so big ones are summarised instead.
+# Lists, tuples and deques are only read up to the item limit.
+SORTED_CONTAINERS = (dict, set, frozenset)
+
+
+def cache_key(x, budget: list = None):
+    # A copy of x made of (type, value) pairs, or None when x holds anything mutable (a tuple holding
+    # a list can change its repr) or is too big to keep alive. Keying on the copy rather than x means
+    # the cache never pins the caller's objects; the types tell (1,) from (True,), which are equal.
+    budget = [MAX_KEY_BYTES] if budget is None else budget
+    kind = type(x)
+    if kind in KEY_ATOMS:
+        budget[0] -= sys.getsizeof(x)
+        return (kind, x) if budget[0] >= 0 else None
+    if kind not in KEY_CONTAINERS:
+        return None
+    budget[0] -= sys.getsizeof(x)
+    if budget[0] < 0:
+        return None
+    items = []
+    for item in x:
+        key = cache_key(item, budget)
+        if key is None:
+            return None
+        items.append(key)
+    return (kind, tuple(items))
+
+
+def sized_len(x):
+    try:
+        return len(x)
+    except Exception:
+        return None
+
+
+class SafeRepr(reprlib.Repr):
+    # Bounded repr for values we don't control (captured locals, exception payloads).
+    # Depth, item and string limits come from reprlib; on top of that every call gets a time
+    # budget, large sized objects are summarised without calling their __repr__, a failing
+    # __repr__ never propagates, and reprs of small immutable values are kept in an LRU cache.
+    fillvalue = "..."
+
+    def __init__(self, max_depth: int = 3, max_items: int = 20, max_string: int = 200, max_other: int = 200,
+                 time_budget: float = 0.05, type_limits: dict = None, max_sized_len: int = 10000, cache_size: int = 1024):
+        super().__init__()
+        self.maxlevel = max_depth
+        self.maxtuple = self.maxlist = self.maxarray = self.maxdict = max_items
+        self.maxset = self.maxfrozenset = self.maxdeque = max_items
+        self.maxstring = self.maxlong = max_string
+        self.maxother = max_other
+        self.time_budget = time_budget
+        self.type_limits = dict(type_limits or {})  # type name -> max characters, e.g. {"DataFrame": 120}
+        self.max_sized_len = max_sized_len
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.local = threading.local()  # Deadline of the call in progress on this thread
+
+    def start(self):
+        self.local.deadline = time.monotonic() + self.time_budget
+
+    def repr(self, x):
+        self.start()
+        return self.repr1(x, self.maxlevel)
+
+    def repr_locals(self, local_vars: dict):
+        # One time budget shared by all variables of the frame
+        self.start()
+        pieces = []
+        for name, value in local_vars.items():
+            pieces.append(f"{name!r}: {self.repr1(value, self.maxlevel)}")
+        return "{" + ", ".join(pieces) + "}"
+
+    def repr1(self, x, level):
+        deadline = getattr(self.local, "deadline", None)
+        if deadline is not None and time.monotonic() > deadline:
+            return self.fillvalue
+        key = cache_key(x)
+        if key is not None:
+            key = (key, level)
+            with self.cache_lock:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    self.cache.move_to_end(key)
+                    return cached
+        try:
+            if isinstance(x, SORTED_CONTAINERS) and len(x) > self.max_sized_len:
+                result = self.summary(x, len(x))
+            else:
+                result = super().repr1(x, level)
+        except Exception:
+            result = f"<{type(x).__name__} instance at {id(x):#x} (repr failed)>"
+        limit = self.type_limits.get(type(x).__name__)
+        if limit is not None and len(result) > limit:
+            result = result[:max(limit - len(self.fillvalue), 0)] + self.fillvalue
+        if key is not None and (deadline is None or time.monotonic() <= deadline):
+            # A repr finished past the deadline may have "..." in place of items: not cached
+            with self.cache_lock:
+                self.cache[key] = result
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return result
+
+    def repr_instance(self, x, level):
+        size = sized_len(x)
+        if size is not None and size > self.max_sized_len:
+            return self.summary(x, size)  # Huge containers (data frames, arrays, ...) aren't rendered
+        return super().repr_instance(x, level)
+
+    def summary(self, x, size: int):
+        shape = getattr(x, "shape", None)
+        detail = f"shape={shape}" if isinstance(shape, tuple) else f"len={size}"
+        return f"<{type(x).__name__} {detail} at {id(x):#x}>"
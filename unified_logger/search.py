@@ -0,0 +1,182 @@
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from .records import shift_rows
+
+
+CHUNK_ROWS = 4096
+MAX_CACHED_CHUNKS = 2048
+MAX_CACHED_QUERIES = 32
+
+
+@lru_cache(maxsize=64)
+def compile_pattern(text: str, regex: bool):
+    # Substring searches are compiled too: one case-insensitive regex beats lowering every message
+    return re.compile(text if regex else re.escape(text), re.IGNORECASE)
+
+
+class Query:
+    # What the filter bar asks for: text (substring or regex), optionally a set of level names, and
+    # the stream id of the viewer tab it was typed in
+    def __init__(self, text: str = "", regex: bool = False, levels=None, stream: int = None):
+        self.text = text
+        self.regex = regex
+        self.levels = frozenset(levels) if levels else None
+        self.stream = stream
+        self.pattern = compile_pattern(text, regex) if text else None  # re.error on a bad regex
+        self.key = (text.lower() if not regex else text, regex, self.levels, stream)
+
+    def refines(self, other: "Query"):
+        # Everything this query matches is also matched by `other`, so other's matches are a superset
+        if other.stream is not None and other.stream != self.stream:
+            return False
+        if other.levels is not None and (self.levels is None or not self.levels <= other.levels):
+            return False
+        if not other.text:
+            return True
+        if self.regex or other.regex:
+            return self.regex and other.regex and self.text == other.text
+        return other.key[0] in self.key[0]
+
+    def matches(self, store, row: int):
+        if self.stream is not None and store.streams[row] != self.stream:
+            return False
+        if self.levels is not None and store.level(row) not in self.levels:
+            return False
+        return self.pattern is None or self.pattern.search(store.message(row)) is not None
+
+    def scan(self, store, rows):
+        return array("I", [row for row in rows if self.matches(store, row)])
+
+
+class FilterView:
+    # Store rows matching a query, in store order. Rows below `split` come from the background scan
+    # (in order, a chunk at a time); rows appended after the filter was set are checked live.
+    def __init__(self, query: Query, split: int):
+        self.query = query
+        self.split = split
+        self.scanned = array("I")
+        self.live = array("I")
+        self.done = False
+
+    def __len__(self):
+        return len(self.scanned) + len(self.live)
+
+    def __getitem__(self, position: int):
+        scanned = len(self.scanned)
+        return self.scanned[position] if position < scanned else self.live[position - scanned]
+
+    def matches(self, store, row: int):
+        return self.query.matches(store, row)
+
+    def add_live(self, store, row: int):
+        if self.query.matches(store, row):
+            self.live.append(row)
+
+    def drop(self, store, count: int):
+        # After store.compact() dropped `count` rows: renumber, and return how many matches went.
+        # Only for a finished scan; a running one is started again instead.
+        before = len(self)
+        self.scanned = shift_rows(self.scanned, count)
+        self.live = shift_rows(self.live, count)
+        self.split = max(self.split - count, 0)
+        return before - len(self)
+
+
+class ChunkCache:
+    # Matches per (query, chunk) for complete chunks. A chunk's matches for a broader query the user
+    # typed earlier are the candidates for a refined one, so narrowing a search rescans only those.
+    def __init__(self, max_chunks: int = MAX_CACHED_CHUNKS):
+        self.max_chunks = max_chunks
+        self.entries = OrderedDict()  # (query key, chunk) -> array of rows
+        self.queries = OrderedDict()  # query key -> Query, most recent last
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            rows = self.entries.get(key)
+            if rows is not None:
+                self.entries.move_to_end(key)
+            return rows
+
+    def put(self, query: Query, chunk: int, rows):
+        with self.lock:
+            self.queries[query.key] = query
+            self.queries.move_to_end(query.key)
+            if len(self.queries) > MAX_CACHED_QUERIES:
+                self.queries.popitem(last=False)
+            self.entries[(query.key, chunk)] = rows
+            if len(self.entries) > self.max_chunks:
+                self.entries.popitem(last=False)
+
+    def matches(self, store, query: Query, chunk: int):
+        start = chunk * CHUNK_ROWS
+        rows = self.get((query.key, chunk))
+        if rows is not None:
+            return rows
+        candidates = range(start, start + CHUNK_ROWS)
+        with self.lock:
+            broader = [other for other in reversed(self.queries.values()) if query.refines(other)]
+        for other in broader:
+            previous = self.get((other.key, chunk))
+            if previous is not None:
+                candidates = previous
+                break
+        rows = query.scan(store, candidates)
+        self.put(query, chunk, rows)
+        return rows
+
+
+class SearchWorker:
+    # One background thread filling the latest FilterView chunk by chunk; setting a new view abandons
+    # the previous scan at the next chunk boundary. The Tk thread only reads the view's arrays.
+    def __init__(self, store):
+        self.store = store
+        self.cache = ChunkCache()
+        self.cond = threading.Condition()
+        self.view = None
+        self.thread = None
+
+    def start(self, view: FilterView):
+        with self.cond:
+            self.view = view
+            self.cond.notify()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="unified-logger-search", daemon=True)
+            self.thread.start()
+
+    def cancel(self):
+        with self.cond:
+            self.view = None
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.view is None:
+                    self.cond.wait()
+                view = self.view
+            self.scan(view)
+            with self.cond:
+                if self.view is view:
+                    self.view = None
+
+    def scan(self, view: FilterView):
+        try:
+            self.scan_chunks(view)
+        except IndexError:
+            pass  # The store was compacted under the scan, which the Tk thread starts again
+        except ValueError:
+            pass  # A log file tab closed, unmapping its file
+
+    def scan_chunks(self, view: FilterView):
+        chunks, partial = divmod(view.split, CHUNK_ROWS)
+        for chunk in range(chunks):
+            if self.view is not view:
+                return
+            view.scanned.extend(self.cache.matches(self.store, view.query, chunk))
+        if partial:
+            start = chunks * CHUNK_ROWS
+            view.scanned.extend(view.query.scan(self.store, range(start, view.split)))  # Not cached: the chunk is still filling
+        view.done = True
@@ -0,0 +1,155 @@
+from array import array
+from .records import LEVEL_ORDER
+from .search import FilterView
+
+try:
+    import numpy
+except ImportError:  # Optional: without it sorting and range filters fall back to sorted() and loops
+    numpy = None
+
+
+SORT_COLUMNS = ("time", "level", "source")
+
+
+def column_keys(store, column: str):
+    # (values, ranks): the store's array column and, for id columns, a list mapping each id to its
+    # place in the sort order (levels by severity, sources by name). ranks is None for times.
+    if column == "time":
+        return store.times, None
+    if column == "level":
+        names = store.level_names
+        return store.levels, [LEVEL_ORDER.index(name) if name in LEVEL_ORDER else len(LEVEL_ORDER) for name in names]
+    if column == "source":
+        names = store.names["stream"]
+        ranks = [0] * len(names)
+        for rank, value in enumerate(sorted(range(len(names)), key=names.__getitem__)):
+            ranks[value] = rank
+        return store.streams, ranks
+    raise ValueError(f"Can't sort by {column!r}, only by {', '.join(SORT_COLUMNS)}")
+
+
+def row_array(store, rows):
+    # The rows of a view as an array("I"); None means every row of the store. Views keep their rows
+    # in arrays already, which are used as they are (callers don't modify them) or concatenated.
+    if rows is None:
+        return array("I", range(len(store)))
+    if isinstance(rows, array):
+        return rows
+    if isinstance(rows, FilterView):
+        return rows.scanned + rows.live  # A new array: the search worker may still be extending scanned
+    if isinstance(getattr(rows, "rows", None), array):
+        return rows.rows  # FacetView, TableView
+    return array("I", rows)
+
+
+def numpy_keys(store, values, ranks, rows):
+    # (row indexes, sort keys) as NumPy arrays. Views of the store's arrays are only held inside
+    # argsort and filter_range: an array exporting its buffer can't grow, and the Tk thread appends
+    # to the store between calls.
+    count = len(store)
+    column = numpy.frombuffer(values, dtype=numpy.dtype(values.typecode), count=count) if count else numpy.zeros(0)
+    if rows is None:
+        indexes, keys = numpy.arange(count, dtype=numpy.uint32), column
+    else:
+        rows = row_array(store, rows)
+        indexes = numpy.frombuffer(rows, dtype=numpy.uint32).copy() if len(rows) else numpy.zeros(0, dtype=numpy.uint32)
+        keys = column[indexes]
+    if ranks is not None:
+        keys = numpy.asarray(ranks, dtype=numpy.int64)[keys.astype(numpy.intp)] if len(keys) else keys
+    return indexes, keys
+
+
+def argsort(store, rows, column: str, descending: bool = False):
+    # The rows ordered by one column, ties in store order, as a new array("I"). Only the key column
+    # and index arrays are touched, never the messages.
+    values, ranks = column_keys(store, column)
+    if numpy is not None:
+        indexes, keys = numpy_keys(store, values, ranks, rows)
+        if descending:
+            keys = -keys.astype(numpy.float64)  # Negated rather than reversed, so ties stay in store order
+        return array("I", indexes[numpy.argsort(keys, kind="stable")].tobytes())
+    key = values.__getitem__ if ranks is None else lambda row: ranks[values[row]]
+    return array("I", sorted(row_array(store, rows), key=key, reverse=descending))
+
+
+def filter_range(store, rows, column: str, low=None, high=None):
+    # The rows with low <= key < high, in their current order. Keys are times, or level and source
+    # ranks as in argsort (LEVEL_ORDER.index for levels).
+    values, ranks = column_keys(store, column)
+    if low is None and high is None:
+        return array("I", row_array(store, rows))
+    if numpy is not None:
+        indexes, keys = numpy_keys(store, values, ranks, rows)
+        mask = numpy.ones(len(keys), dtype=bool)
+        if low is not None:
+            mask &= keys >= low
+        if high is not None:
+            mask &= keys < high
+        return array("I", indexes[mask].tobytes())
+    low = float("-inf") if low is None else low
+    high = float("inf") if high is None else high
+    rows = row_array(store, rows)
+    if ranks is None:
+        return array("I", [row for row in rows if low <= values[row] < high])
+    return array("I", [row for row in rows if low <= ranks[values[row]] < high])
+
+
+class TableView:
+    # Rows of another view (None: the whole store) kept in table order: an index array from
+    # filter_range and argsort over the store's columns. Sorted oldest first, new arrivals in range
+    # are appended live; in any other order they are only counted as `stale` until the next sort.
+    def __init__(self, store, source=None, column: str = "time", descending: bool = False, ranges: dict = None):
+        self.source = source
+        self.column = column
+        self.descending = descending
+        self.ranges = dict(ranges or {})  # column -> (low, high)
+        self.follows = column == "time" and not descending
+        self.stale = 0
+        self.done = True
+        self.keys = {}  # range column -> (values, ranks), for checking new arrivals
+        rows = source
+        for range_column, (low, high) in self.ranges.items():
+            rows = filter_range(store, rows, range_column, low, high)
+            self.keys[range_column] = column_keys(store, range_column)
+        self.rows = argsort(store, rows, column, descending)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, position: int):
+        return self.rows[position]
+
+    def matches(self, store, row: int):
+        if self.source is not None and not self.source.matches(store, row):
+            return False
+        for column, (low, high) in self.ranges.items():
+            values, ranks = self.keys[column]
+            if ranks is not None and values[row] >= len(ranks):
+                values, ranks = self.keys[column] = column_keys(store, column)  # A level or source new since the sort
+            key = values[row] if ranks is None else ranks[values[row]]
+            if (low is not None and key < low) or (high is not None and key >= high):
+                return False
+        return True
+
+    def add_live(self, store, row: int):
+        if not self.matches(store, row):
+            return
+        if self.follows:
+            self.rows.append(row)
+        else:
+            self.stale += 1
+
+    def drop(self, store, count: int):
+        # After store.compact() dropped `count` rows: renumber, and return how many of ours went
+        if self.source is not None:
+            self.source.drop(store, count)  # Shown again when table mode is turned off
+        before = len(self.rows)
+        self.rows = array("I", [row - count for row in self.rows if row >= count])
+        return before - len(self.rows)
+
+    def position(self, row: int):
+        # Position of a store row, for jumping to it; rows aren't in store order here
+        try:
+            return self.rows.index(row)
+        except ValueError:
+            return 0
@@ -0,0 +1,141 @@
+import threading
+import time
+import tkinter as tk
+from collections import OrderedDict
+from ttkbootstrap import Toplevel, Frame, Label
+
+
+MAX_TOASTS = 3  # windows on screen at once, and in the pool
+TOAST_DURATION = 3000  # ms
+TOAST_WINDOW = 0.5  # seconds during which messages of one level merge into one toast
+TOAST_RATE = 2.0  # toasts shown per second at most
+TOAST_POLL = 100  # ms
+TOAST_WIDTH = 300
+TOAST_HEIGHT = 75
+MAX_TOAST_CHARS = 300
+LEVEL_NOUNS = {"error": "errors", "critical": "critical errors", "warning": "warnings", "exception": "exceptions"}
+
+
+class ToastQueue:
+    # Toasts waiting for a window, one entry per level. Messages of a level arriving within `window`
+    # seconds of its first one, or while its toast waits for a free window, merge into that entry, so
+    # the queue never holds more entries than there are levels. Any thread may add; take() releases
+    # ready entries oldest first, at most `rate` per second. An exception snapshot added with a message
+    # is only turned into text by take(), on the Tk thread, and only for the toast actually shown.
+    def __init__(self, window: float = TOAST_WINDOW, rate: float = TOAST_RATE):
+        self.window = window
+        self.interval = 1 / rate
+        self.entries = OrderedDict()  # level -> [first arrival, count, latest message, its snapshot]
+        self.lock = threading.Lock()
+        self.last_shown = float("-inf")
+        self.merged = 0  # messages that didn't get a toast of their own
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, message: str, level: str, now: float = None, snapshot=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            entry = self.entries.get(level)
+            if entry is None:
+                self.entries[level] = [now, 1, message, snapshot]
+            else:
+                entry[1] += 1
+                entry[2:] = message, snapshot
+                self.merged += 1
+
+    def take(self, free: int, now: float = None):
+        # (level, title, message) for up to `free` toasts due now
+        now = time.monotonic() if now is None else now
+        shown = []
+        with self.lock:
+            for level, (first, count, message, snapshot) in list(self.entries.items()):
+                if len(shown) >= free or now - self.last_shown < self.interval:
+                    break
+                if now - first < self.window:
+                    continue
+                del self.entries[level]
+                self.last_shown = now
+                if snapshot is not None:
+                    message = f"{message}\n{''.join(snapshot.exception_only).rstrip()}"  # Not the whole traceback
+                shown.append((level, *toast_text(level, count, message)))
+        return shown
+
+
+def toast_text(level: str, count: int, message: str):
+    if len(message) > MAX_TOAST_CHARS:
+        message = message[:MAX_TOAST_CHARS] + " …"
+    if count == 1:
+        return level.upper(), message
+    return f"{count} new {LEVEL_NOUNS.get(level, f'{level} messages')}", f"Latest: {message}"
+
+
+class ToastManager:
+    # Shows a ToastQueue in a fixed pool of windows. A window is built the first time its slot is
+    # needed and afterwards only reconfigured, shown and withdrawn, so however many messages arrive
+    # there are never more than `max_windows` Toplevels. Runs on the Tk thread.
+    def __init__(self, root, queue: ToastQueue, boot_style, max_windows: int = MAX_TOASTS, duration: int = TOAST_DURATION):
+        self.root = root
+        self.queue = queue
+        self.boot_style = boot_style  # level -> bootstyle
+        self.max_windows = max_windows
+        self.duration = duration
+        self.windows = []  # ToastWindow per slot, built on demand
+        self.idle = []  # windows free to reuse
+        self.root.after(TOAST_POLL, self.tick)
+
+    def tick(self):
+        free = len(self.idle) + self.max_windows - len(self.windows)
+        for level, title, message in self.queue.take(free):
+            window = self.idle.pop() if self.idle else self.new_window()
+            window.show(title, message, self.boot_style(level))
+            window.timer = self.root.after(self.duration, self.release, window)
+        self.root.after(TOAST_POLL, self.tick)
+
+    def new_window(self):
+        window = ToastWindow(self.root, len(self.windows), self.release)
+        self.windows.append(window)
+        return window
+
+    def release(self, window):
+        if window in self.idle:
+            return
+        if window.timer is not None:
+            self.root.after_cancel(window.timer)
+            window.timer = None
+        window.hide()
+        self.idle.append(window)
+        self.idle.sort(key=lambda idle: -idle.slot)  # Lowest slot (nearest the corner) reused first
+
+
+class ToastWindow:
+    # One pooled toast: a borderless Toplevel stacked above the lower right corner by slot
+    def __init__(self, root, slot: int, on_click):
+        self.slot = slot
+        self.timer = None
+        self.style = None
+        self.toplevel = Toplevel(master=root, overrideredirect=True, alpha=0.95, minsize=(TOAST_WIDTH, TOAST_HEIGHT))
+        self.toplevel.withdraw()
+        self.container = Frame(self.toplevel)
+        self.container.pack(fill=tk.BOTH, expand=tk.YES)
+        self.title = Label(self.container, anchor=tk.NW, font="TkHeadingFont")
+        self.title.pack(fill=tk.X, padx=10, pady=(5, 0))
+        self.message = Label(self.container, anchor=tk.NW, wraplength=TOAST_WIDTH)
+        self.message.pack(fill=tk.BOTH, expand=tk.YES, padx=10, pady=(0, 5))
+        self.toplevel.bind("<ButtonPress>", lambda event: on_click(self))  # Children have the toplevel's bindtag
+
+    def show(self, title: str, message: str, style: str):
+        if style != self.style:
+            self.style = style
+            self.container.configure(bootstyle=style)
+            self.title.configure(bootstyle=f"{style}-inverse")
+            self.message.configure(bootstyle=f"{style}-inverse")
+        self.title.configure(text=title)
+        self.message.configure(text=message)
+        self.toplevel.geometry(f"-0-{self.slot * (TOAST_HEIGHT + 5)}")
+        self.toplevel.deiconify()
+        self.toplevel.lift()
+        self.toplevel.bell()
+
+    def hide(self):
+        self.toplevel.withdraw()
@@ -1,20 +1,41 @@
-from loguru import logger
-import traceback
 import typer
 import inspect
 import tkinter as tk
 import tkinter.font as tkf
-from tkinter import Canvas, Scrollbar, Label, Button, Listbox, Text
+from tkinter import filedialog, ttk
+from tkinter import Label, Button, Text
 from ttkbootstrap import Style
-from ttkbootstrap.toast import ToastNotification as Toast
-from tkfontawesome import icon_to_image
 import os
+import re
+import asyncio
 import sys  # Import sys module
+import time
+import threading
+from collections import deque
 from datetime import datetime
+from .safe_repr import SafeRepr
+from .fingerprint import ExceptionAggregator, CircuitBreaker
+from .frames import ExceptionSnapshot
+from .async_capture import chained_task_factory, current_task, describe_task, format_task, innermost_locals, TASK_CHAIN_SUPPORTED
+from .records import RecordStore, FacetView, SCROLLBACK, MAX_ROWS, LIVE_STREAM, LEVEL_ORDER
+from .logfile import LogFileIndex, LogFileStore
+from .render_cache import RenderCache
+from .toasts import ToastQueue, ToastManager
+from .search import Query, FilterView
+from .table import TableView
+from .viewer import LogViewer, TextLogViewer, FacetPanel, Minimap, ViewerTab, IngestQueue, SPEEDS
+from .pipeline import new_pipeline, QueuedSink, JsonSerializer, register_for_shutdown, run_with_deadline, child_path, SHUTDOWN_TIMEOUT
+
+
+SEARCH_DELAY = 200  # ms
+FACET_REFRESH = 1.0  # seconds between facet count updates
+GUI_POLL = 20  # ms between checks for calls handed to the GUI thread
+GUI_START_TIMEOUT = 10.0
+INDEX_POLL = 500  # ms between scrollbar refreshes while a file is being indexed
 
 
 class UnifiedLogger:
-    def __init__(self, app_name: str = "UnifiedLogger", interfaces: str = "cli,gui", log_level: str = 'DEBUG', log_folder: str = 'logs'):
+    def __init__(self, app_name: str = "UnifiedLogger", interfaces: str = "cli,gui", log_level: str = 'DEBUG', log_folder: str = 'logs', per_child_files: bool = False, on_fork=None, file_policy: str = None, gui_mode: str = "thread"):
         self.app = typer.Typer()
         self.interfaces = interfaces.lower().split(',')
         self.app_name = app_name
@@ -22,7 +43,35 @@ class UnifiedLogger:
         self.log_level = log_level
         self.log_folder = log_folder
         self.log_format = "{time} [{level}] {message}"
+        self.logger = new_pipeline()  # Each instance owns its sinks instead of sharing the global loguru logger
+        self.file_sink = None
+        self.log_stream_handler = None
+        self.file_policy = file_policy  # Backpressure policy for the log file; None writes on the caller's thread
+        self.file_writer = None
+        self.queued_sinks = {}  # sink id -> QueuedSink, for sinks added with a backpressure policy
+        self.closed = False
+        self.log_files = {}  # path -> [LogFileStore, open tabs]: tabs of one file share its index and mmap
+        self.per_child_files = per_child_files  # After fork, children write to <log>-<pid> files
+        self.on_fork = on_fork  # Called with this instance in a forked child, e.g. to reconnect to a collector
+        self.safe_repr = SafeRepr()  # Bounded repr for captured locals
+        self.exception_aggregator = ExceptionAggregator()  # Full tracebacks only for the first few repeats of an exception
+        self.capture_frame_locals = False  # Also safe-repr the locals of every traceback frame
+        self.circuit_breaker = CircuitBreaker()  # Above its exception rate, only per-fingerprint summaries are logged
+        self.storm_timer = None
+        self.storm_lock = threading.Lock()
+        self.render_cache = RenderCache()  # Icons, font metrics and wrap heights for the GUI
+        self.gui_mode = gui_mode  # "thread": Tk runs on its own thread; "main": run_gui() blocks in mainloop (macOS needs this)
+        self.gui_thread = None
+        self.gui_calls = deque()  # (func, args) handed to the GUI thread by other threads
+        self.gui_ready = threading.Event()
+        self.gui_error = None
+        self.toast_queue = ToastQueue()  # Filled from any thread, shown by the GUI thread's ToastManager
+        self.toasts = None
+        self.viewer_queue = IngestQueue()  # No Tk in it: viewer sources can feed it before the viewer is built
         self.init_loguru(log_level, log_folder)
+        if "cli" in self.interfaces:
+            self.add_stream_handler()  # The console output loguru's global default handler used to give
+        register_for_shutdown(self)  # close() runs at exit and on SIGTERM
 
         if "gui" in self.interfaces:
             self.run_gui()
@@ -40,38 +89,151 @@ class UnifiedLogger:
         self.log_file = log_file  # Define log_file attribute
         self.log_folder = log_folder  # Define log_folder attribute
         self.log_level = log_level  # Define log_level attribute.log_level
-        logger.add(log_file, level=log_level.upper(), format="{time} [{level}] {message}", rotation="1 day")  # Use uppercase log level
+        if self.file_policy is None:
+            self.file_sink = self.logger.add(log_file, level=log_level.upper(), format=self.format_record, rotation="1 day")  # Use uppercase log level
+            return
+        # Queued file sink: the worker thread writes pre-formatted text through a raw pipeline that keeps rotation
+        self.file_writer = new_pipeline()
+        self.file_writer.add(log_file, format="{message}", rotation="1 day")
+        file_writer = self.file_writer.opt(raw=True)
+        self.file_sink = self.add_queued_sink(file_writer.info, log_level.upper(), self.file_policy)
+
+    def remove_file_sink(self):
+        # Only the file sink is rebuilt on level/format changes; other sinks of this instance stay attached
+        if self.file_sink is not None:
+            self.logger.remove(self.file_sink)
+            queued = self.queued_sinks.pop(self.file_sink, None)
+            if queued is not None:
+                queued.close()
+            self.file_sink = None
+        if self.file_writer is not None:
+            self.file_writer.remove()
+            self.file_writer = None
+
+    def format_record(self, record):
+        # Loguru format callable: adds the traceback snapshot attached by log_exception/custom_traceback.
+        # Formatting happens on the logging thread, so sinks using it (the file sink unless file_policy
+        # is set, stderr, add_logging_sink without a policy) render the snapshot there; queued sinks
+        # use format_deferred instead.
+        if "traceback" in record["extra"]:
+            return self.log_format + "\n{extra[traceback]}\n{exception}"
+        return self.log_format + "\n{exception}"
+
+    def format_deferred(self, record):
+        # The queued sink's worker renders and appends the traceback snapshot
+        return self.log_format + "\n{exception}"
 
     def set_level(self, level):
-        logger.remove() # Remove existing handlers
+        self.remove_file_sink()
         self.log_level = level
         self.init_loguru(log_level=level, log_folder=self.log_folder)
 
-    def display_toast(self, message: str, level: str = "info"):
-        icon_name = self.get_icon_name(level)
-        boot_style = self.get_boot_style(level)
-        #icon_image = icon_to_image(icon_name, fill="#177255", scale_to_height=15)
-        Toast(title="ttkbootstrap toast message",  message=message,duration=3000, bootstyle=boot_style,alert=True, position= (100, 100, 'se')).show_toast() #icon=icon_image, iconfont=None,
+    def display_toast(self, message: str, level: str = "info", snapshot=None):
+        # Safe from any thread. Bursts merge into "N new errors" toasts and at most MAX_TOASTS pooled
+        # windows are ever shown, however fast messages arrive. A snapshot's exception line is added
+        # to the message on the Tk thread.
+        self.toast_queue.add(message, level, snapshot=snapshot)
 
 
     def set_format(self, format):
         self.log_format = format
-        logger.remove() # Remove existing handlers
+        self.remove_file_sink()
         self.init_loguru(log_level=self.log_level, log_folder=self.log_folder)
 
     def display(self, message: str, level: str = "info", gui: bool = False):
-        log_func = getattr(logger, level, logger.info)
+        log_func = getattr(self.logger, level, self.logger.info)
         log_func(message)
         if gui and hasattr(self, 'root'):
             self.display_toast(message, level)
 
-    def log_exception(self, e: Exception, gui: bool = False):
-        local_vars = self.get_local_vars()
-        message = f"Exception: {e} | Local variables: {local_vars}"
-        logger.exception(message)
+    def log_exception(self, e: Exception, gui: bool = False, local_vars: dict = None, task=None):
+        fp = self.triage_exception(e, gui)
+        if fp is None:
+            return
+        if local_vars is None:
+            local_vars = self.get_local_vars()
+        message = f"Exception [{fp}]: {e} | Local variables: {self.safe_repr.repr_locals(local_vars)}"
+        # Inside asyncio the logical task chain says more than the event-loop frames around it
+        task_info = describe_task(task or current_task(), self.safe_repr)
+        if task_info is not None:
+            message += f" | {format_task(task_info)}"
+        snapshot = self.capture_snapshot(e)
+        self.logger.bind(traceback=snapshot, task=task_info, fingerprint=fp).error(message)
+        if gui:
+            self.display_toast(message, "error", snapshot)
+
+    def capture_snapshot(self, e: Exception):
+        # Code objects and line numbers only; text is rendered later by the sink that writes it
+        return ExceptionSnapshot.capture(e, safe_repr=self.safe_repr if self.capture_frame_locals else None)
+
+    def triage_exception(self, e: Exception, gui: bool = False):
+        # Shared by log_exception and custom_traceback. Returns the fingerprint when a full entry should
+        # be written; repeats get a compact reference instead, and during an exception storm only a count.
+        fp, count, full = self.exception_aggregator.record(e)
+        if self.circuit_breaker.record(e, fp):
+            self.start_storm_summaries()
+            return None
+        if not full:
+            if self.exception_aggregator.first_reference(e):
+                self.log_exception_reference(e, fp, count, gui)
+            return None
+        return fp
+
+    def start_storm_summaries(self):
+        with self.storm_lock:
+            if self.storm_timer is not None:
+                return
+            self.schedule_storm_summary()
+        self.logger.warning(f"Exception rate above {self.circuit_breaker.threshold:g}/s: tracebacks and locals suspended, "
+                            f"summaries every {self.circuit_breaker.summary_interval:g}s")
+
+    def schedule_storm_summary(self):
+        self.storm_timer = threading.Timer(self.circuit_breaker.summary_interval, self.emit_storm_summary)
+        self.storm_timer.daemon = True
+        self.storm_timer.start()
+
+    def emit_storm_summary(self, final: bool = False):
+        summary, elapsed, degraded = self.circuit_breaker.take_summary()
+        if summary:
+            total = sum(count for count, _ in summary.values())
+            top = sorted(summary.items(), key=lambda item: item[1][0], reverse=True)[:10]
+            groups = "; ".join(f"[{fp}] x{count} {text}" for fp, (count, text) in top)
+            self.logger.warning(f"Exception storm: {total} exceptions in {elapsed:.0f}s | {groups}")
+        with self.storm_lock:
+            if degraded and not final:
+                self.schedule_storm_summary()
+                return
+            self.storm_timer = None
+        if not degraded:
+            self.logger.warning("Exception rate back to normal: full tracebacks resumed")
+
+    def log_exception_reference(self, e: Exception, fp: str, count: int, gui: bool = False):
+        # Compact line for a repeat whose full traceback was already written
+        message = f"Exception [{fp}] repeated ({count} total): {type(e).__name__}: {e}"
+        self.logger.error(message)
         if gui:
             self.display_toast(message, "error")
 
+    def install_asyncio_handler(self, loop=None):
+        # Route unhandled task errors through log_exception, and record parent task chains for new tasks
+        loop = loop or asyncio.get_running_loop()
+        previous = loop.get_exception_handler()
+
+        def handle_exception(loop, context):
+            e = context.get("exception")
+            if e is None:
+                if previous is not None:
+                    previous(loop, context)
+                else:
+                    loop.default_exception_handler(context)
+                return
+            # The caller here is the event loop, so take locals from where the exception was raised
+            self.log_exception(e, local_vars=innermost_locals(e), task=context.get("task") or context.get("future"))
+
+        loop.set_exception_handler(handle_exception)
+        if TASK_CHAIN_SUPPORTED and loop.get_task_factory() is None:
+            loop.set_task_factory(chained_task_factory)
+
     def get_local_vars(self):
         frame = inspect.currentframe().f_back.f_back
         local_vars = inspect.getargvalues(frame).locals
@@ -86,32 +248,163 @@ class UnifiedLogger:
             self.app()
 
     def run_gui(self):
-        self.root = tk.Tk()
-        self.style = Style(self.theme_name)
-        #self.toast = Toast(self.root) #this doesn't seem right, it should be a notice that is shown as a toast when the error or message is called for
+        if self.gui_mode != "thread":
+            self.gui_main()
+            return
+        if self.gui_thread is not None and self.gui_thread.is_alive():
+            self.wait_gui()  # Already running: block until the window closes, as mainloop() used to
+            return
+        # Tk lives on its own thread so the constructor goes on to run_cli and the application code
+        self.gui_thread = threading.Thread(target=self.gui_main, name="unified-logger-gui", daemon=True)
+        self.gui_thread.start()
+        self.gui_ready.wait(GUI_START_TIMEOUT)
+        if self.gui_error is not None:
+            raise self.gui_error
+
+    def gui_main(self):
+        try:
+            self.gui_thread = threading.current_thread()
+            self.root = tk.Tk()
+            self.style = Style(self.theme_name)
+        except Exception as e:
+            self.gui_error = e  # run_gui re-raises it on the constructor's thread
+            if self.gui_mode != "thread":
+                raise
+            return
+        finally:
+            self.gui_ready.set()
+        self.toasts = ToastManager(self.root, self.toast_queue, self.get_boot_style)
         #self.create_log_viewer() # Initialize the GUI log viewer # only do that when wanted though
+        self.root.after(GUI_POLL, self.run_gui_calls)
         self.root.mainloop()
+        try:
+            self.root.destroy()  # On this thread: Tcl aborts if its interpreter is torn down from another
+        except tk.TclError:
+            pass  # Already destroyed, e.g. the window was closed
+
+    def wait_gui(self, timeout: float = None):
+        # Keep the program, and with it the window, alive until the user closes the window: the GUI
+        # thread is a daemon, and close() at exit quits Tk. Returns whether the window was closed in time.
+        thread = self.gui_thread
+        if thread is None or thread is threading.current_thread():
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def in_gui_thread(self):
+        return self.gui_thread is None or threading.current_thread() is self.gui_thread
+
+    def call_in_gui(self, func, *args):
+        # Tk may only be used from its own thread: other threads append to a deque (no lock, never
+        # blocks) and the GUI thread runs the calls on its next poll
+        if self.in_gui_thread():
+            return func(*args)
+        self.gui_calls.append((func, args))
+
+    def run_gui_calls(self):
+        for _ in range(len(self.gui_calls)):
+            func, args = self.gui_calls.popleft()
+            try:
+                func(*args)
+            except Exception as e:
+                self.log_exception(e, local_vars={})
+        self.root.after(GUI_POLL, self.run_gui_calls)
+
+    def stop_gui(self):
+        if hasattr(self, 'root'):
+            self.call_in_gui(self.root.quit)
 
     def progress_bar(self, iterable, label: str = "Processing"):
         with typer.progressbar(iterable, label=label) as progress:
             for item in progress:
                 yield item
 
-    def add_logging_sink(self, sink, level="INFO"):
-        logger.add(sink, level=level)
+    def add_logging_sink(self, sink, level="INFO", policy: str = None, max_queue: int = 10000, spill_path: str = None):
+        if policy is None:
+            return self.logger.add(sink, level=level, format=self.format_record)
+        return self.add_queued_sink(sink, level, policy, max_queue, spill_path)
+
+    def add_structured_sink(self, sink, level="DEBUG", max_bytes: int = 16384, policy: str = "block", max_queue: int = 10000):
+        # JSON lines with exceptions as structured data (type, message, frames, causes, capped locals).
+        # Serialization runs on the sink's worker thread, and no line exceeds max_bytes.
+        return self.add_queued_sink(sink, level, policy, max_queue, serializer=JsonSerializer(max_bytes))
+
+    def add_queued_sink(self, sink, level, policy: str, max_queue: int = 10000, spill_path: str = None, serializer=None):
+        # Put the sink behind a bounded queue so a slow sink can't add latency to display()
+        if policy == "spill" and spill_path is None:
+            spill_path = os.path.join(self.log_folder, f'spill-{len(self.queued_sinks)}-{datetime.now().strftime("%Y%m%d-%H%M%S")}.jsonl')
+        queued = QueuedSink(sink, max_queue=max_queue, policy=policy, spill_path=spill_path, per_child_files=self.per_child_files,
+                            serializer=serializer)
+        sink_id = self.logger.add(queued, level=level, format=self.format_deferred)
+        self.queued_sinks[sink_id] = queued
+        return sink_id
+
+    def close(self, timeout: float = SHUTDOWN_TIMEOUT):
+        # Drain queued sinks, then remove every handler (closing files and finishing compression),
+        # all within one deadline. Returns what could not be flushed in time.
+        report = {"unflushed": {}, "timed_out": []}
+        if self.closed:
+            return report
+        self.closed = True
+        deadline = time.monotonic() + timeout
+        if self.gui_mode == "thread":
+            self.stop_gui()
+            if self.gui_thread is not None and self.gui_thread is not threading.current_thread():
+                self.gui_thread.join(max(deadline - time.monotonic(), 0))
+        for store, _ in self.log_files.values():
+            store.index.close()  # Unmaps, and removes decompressed copies
+        self.log_files.clear()
+        if self.storm_timer is not None:
+            self.storm_timer.cancel()
+            self.emit_storm_summary(final=True)  # Don't lose the counts of an ongoing storm
+        for sink_id, queued in self.queued_sinks.items():
+            left = queued.close(timeout=deadline - time.monotonic())
+            if left:
+                report["unflushed"][sink_id] = left
+        if not run_with_deadline(self.remove_handlers, deadline - time.monotonic()):
+            report["timed_out"].append("handlers")
+        self.file_sink = None
+        return report
+
+    def remove_handlers(self):
+        self.logger.remove()
+        if self.file_writer is not None:
+            self.file_writer.remove()
+
+    def after_fork_in_child(self):
+        # Queued sinks are rebuilt by the pipeline's own fork hook; here we only move the file sink
+        self.storm_lock = threading.Lock()
+        self.storm_timer = None  # The timer thread doesn't exist in the child
+        if self.per_child_files and self.file_sink is not None:
+            self.remove_file_sink()
+            self.init_loguru(log_level=self.log_level, log_folder=self.log_folder, log_file=child_path(self.log_file))
+        if self.on_fork is not None:
+            self.on_fork(self)
+
+    def sink_stats(self):
+        return {sink_id: queued.stats() for sink_id, queued in self.queued_sinks.items()}
 
     def custom_traceback(self, e: Exception, gui: bool = False):
-        tb = traceback.format_exception(type(e), e, e.__traceback__)
-        custom_tb = "Custom Traceback:\n" + "".join(tb)
-        logger.error(custom_tb)
+        fp = self.triage_exception(e, gui)
+        if fp is None:
+            return
+        snapshot = self.capture_snapshot(e)
+        self.logger.bind(traceback=snapshot, fingerprint=fp).error(f"Custom Traceback [{fp}]:")
         if gui:
-            self.display_toast(custom_tb, "error")
+            self.display_toast(f"Custom Traceback [{fp}]:", "error", snapshot)
 
     def switch_theme(self, theme_name: str):
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.switch_theme, theme_name)
         self.style.theme_use(theme_name)
+        self.render_cache.invalidate()  # Cached icons are colored for the old theme
+        for tab in getattr(self, 'viewer_tabs', ()):
+            tab.viewer.apply_theme(self.style.colors)
 
     def configure_cli_command(self, command_name, *args, **kwargs):
         # Create a new window for configuring the CLI command
+        if not self.in_gui_thread():
+            return self.call_in_gui(lambda: self.configure_cli_command(command_name, *args, **kwargs))
         config_window = tk.Toplevel(self.root)
         config_window.title(f"Configure {command_name}")
 
@@ -141,89 +434,386 @@ class UnifiedLogger:
         command_func(*args, **kwargs)
 
     def create_debug_console(self):
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.create_debug_console)
         self.console = Text(self.root)
         self.console.pack()
         # Add more functionalities to support interactive debugging
 
-    def create_log_viewer(self):
+    def create_log_viewer(self, backend: str = "canvas", scrollback: int = SCROLLBACK, max_rows: int = MAX_ROWS):
+        # backend: "canvas" draws only the visible rows; "text" keeps the last `scrollback` rows in one tk.Text.
+        # Only the newest `scrollback` messages stay in memory, older ones are read back from the log file,
+        # and past `max_rows` the oldest rows are dropped altogether.
+        # Called from another thread, the viewer is built on the GUI thread shortly after.
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.create_log_viewer, backend, scrollback, max_rows)
         self.log_viewer_frame = tk.Frame(self.root)
         self.log_viewer_frame.pack(fill=tk.BOTH, expand=tk.YES)
-
-        self.log_viewer_canvas = Canvas(self.log_viewer_frame, bg=self.style.colors.bg)
-        self.log_viewer_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=tk.YES)
-
-        self.log_viewer_scrollbar = Scrollbar(self.log_viewer_frame, command=self.log_viewer_canvas.yview)
-        self.log_viewer_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-        self.log_viewer_canvas.configure(yscrollcommand=self.log_viewer_scrollbar.set)
-        self.log_viewer_canvas.bind('<Configure>', self.on_canvas_configure)
-
-        self.log_viewer_content = tk.Frame(self.log_viewer_canvas)
-        self.log_viewer_canvas.create_window((0, 0), window=self.log_viewer_content, anchor=tk.NW)
-
-        logger.add(self.update_log_viewer)
+        self.viewer_backend = backend
+        self.viewer_scrollback = scrollback
+
+        # Records from every stream go into one compact store; each tab is a view of row indexes over it
+        self.record_store = RecordStore(capacity=scrollback, max_rows=max_rows)
+        self.viewer_tabs = []
+        self.viewer_tab = None
+        self.log_viewer = None
+
+        # Buttons along the bottom, packed first so they keep their space when the window shrinks
+        self.viewer_toolbar = tk.Frame(self.log_viewer_frame)
+        self.viewer_toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+
+        # Search/filter bar; matching runs on a worker thread against the current tab's store
+        self.search_after = None
+        self.search_bar = tk.Frame(self.log_viewer_frame)
+        self.search_bar.pack(fill=tk.X)
+        self.search_text = tk.StringVar()
+        self.search_regex = tk.BooleanVar()
+        self.search_level = tk.StringVar(value="ALL")
+        self.search_entry = tk.Entry(self.search_bar, textvariable=self.search_text)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=tk.YES)
+        self.search_entry.bind("<KeyRelease>", lambda event: self.on_search_changed())
+        tk.Checkbutton(self.search_bar, text="Regex", variable=self.search_regex, command=self.on_search_changed).pack(side=tk.LEFT)
+        tk.OptionMenu(self.search_bar, self.search_level, "ALL", *LEVEL_ORDER, command=lambda value: self.on_search_changed()).pack(side=tk.LEFT)
+        self.search_status = Label(self.search_bar, text="")
+        self.search_status.pack(side=tk.LEFT)
+
+        # Level, module, call-site and stream counts; clicking one filters from the store's row lists
+        self.facet_panel = FacetPanel(self.log_viewer_frame, self.record_store, self.show_facets)
+        self.facet_panel.frame.pack(side=tk.LEFT, fill=tk.Y)
+        self.facets_refreshed = 0.0
+
+        # Density timeline of the whole store, steering whichever tab is current (the text backend
+        # scrolls by itself)
+        self.minimap = None
+        if backend != "text":
+            self.minimap = Minimap(self.log_viewer_frame, self.record_store, None, self.style.colors)
+            self.minimap.canvas.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.viewer_notebook = ttk.Notebook(self.log_viewer_frame)
+        self.viewer_notebook.pack(fill=tk.BOTH, expand=tk.YES)
+        self.viewer_notebook.bind("<<NotebookTabChanged>>", lambda event: self.on_viewer_tab_changed())
+        self.viewer_notebook.bind("<Button-2>", self.on_viewer_tab_middle_click)
+        self.open_viewer_tab("Live", LIVE_STREAM)
+
+        # Logging threads only enqueue; a single Tk tick per frame moves a bounded batch into the store
+        self.logger.add(self.update_log_viewer)
+        self.root.after(self.viewer_queue.interval, self.drain_log_viewer)
         # Add a copy button
-        self.copy_button = Button(self.log_viewer_frame, text="Copy", command=self.copy_to_clipboard)
-        self.copy_button.pack()
+        self.copy_button = Button(self.viewer_toolbar, text="Copy", command=self.copy_to_clipboard)
+        self.copy_button.pack(side=tk.LEFT)
 
         # Add speed control buttons
-        self.speed_button_slow = Button(self.log_viewer_frame, text="Slow", command=lambda: self.set_speed("slow"))
+        self.speed_button_slow = Button(self.viewer_toolbar, text="Slow", command=lambda: self.set_speed("slow"))
         self.speed_button_slow.pack(side=tk.LEFT)
 
-        self.speed_button_normal = Button(self.log_viewer_frame, text="Normal", command=lambda: self.set_speed("normal"))
+        self.speed_button_normal = Button(self.viewer_toolbar, text="Normal", command=lambda: self.set_speed("normal"))
         self.speed_button_normal.pack(side=tk.LEFT)
 
-        self.speed_button_fast = Button(self.log_viewer_frame, text="Fast", command=lambda: self.set_speed("fast"))
+        self.speed_button_fast = Button(self.viewer_toolbar, text="Fast", command=lambda: self.set_speed("fast"))
         self.speed_button_fast.pack(side=tk.LEFT)
 
-    def update_log_viewer(self, message):
-        icon_name = self.get_icon_name(message)
-        text_label = tk.Label(self.log_viewer_content, text=message, wraplength=800)
-        icon_height = self.get_line_height(text_label)
-        icon_image = icon_to_image(icon_name, fill="#177255", scale_to_height=icon_height)
-        icon_label = Label(self.log_viewer_content, image=icon_image)
-        icon_label.image = icon_image # Keep a reference to the image
-        icon_label.pack(side=tk.LEFT)
-
-        text_label.pack(side=tk.LEFT, fill=tk.X, expand=tk.YES)
-
-        self.log_viewer_content.update_idletasks()
-        self.log_viewer_canvas.config(scrollregion=self.log_viewer_canvas.bbox("all"))
-        # Auto-scroll to the latest log entry if the user is at the latest row
-        if self.log_viewer_canvas.yview()[1] == 1.0:
-            self.log_viewer_canvas.yview_moveto(1.0)
+        self.wrap_button = Button(self.viewer_toolbar, text="Wrap", command=lambda: self.log_viewer.set_wrap(not self.log_viewer.wrap))
+        self.wrap_button.pack(side=tk.LEFT)
+
+        self.open_button = Button(self.viewer_toolbar, text="Open file", command=self.open_log_file)
+        self.open_button.pack(side=tk.LEFT)
+
+        self.new_tab_button = Button(self.viewer_toolbar, text="New tab", command=self.duplicate_viewer_tab)
+        self.new_tab_button.pack(side=tk.LEFT)
+
+        self.table_button = Button(self.viewer_toolbar, text="Table", command=self.toggle_table)
+        self.table_button.pack(side=tk.LEFT)
+
+    def open_viewer_tab(self, title: str, stream: str = LIVE_STREAM, store=None):
+        # A tab over `store` (the shared record store by default) showing one stream, or every row when
+        # stream is None. Tabs on the same stream share the store's row list for it, so each one costs
+        # its viewer's fixed widget pool and whatever index arrays its own filter builds.
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.open_viewer_tab, title, stream, store)
+        store = store if store is not None else self.record_store
+        if self.viewer_backend == "text":
+            viewer = TextLogViewer(self.viewer_notebook, store, self.style.colors, self.get_icon_name, self.get_boot_style,
+                                   self.render_cache, scrollback=self.viewer_scrollback)
+        else:
+            viewer = LogViewer(self.viewer_notebook, store, self.style.colors, self.get_icon_name, self.get_boot_style, self.render_cache)
+        tab = ViewerTab(viewer, store, store.intern("stream", stream) if stream is not None else None)
+        viewer.on_sort = self.sort_log_viewer
+        viewer.set_rows(tab.base())
+        self.viewer_tabs.append(tab)
+        self.viewer_notebook.add(viewer.frame, text=title)
+        self.viewer_notebook.select(viewer.frame)
+        self.on_viewer_tab_changed()  # Select's event only arrives with the next event loop turn
+        return tab
+
+    def duplicate_viewer_tab(self):
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.duplicate_viewer_tab)
+        tab = self.viewer_tab
+        if tab.store is not self.record_store:
+            return self.open_log_file(tab.store.index.path)  # Shares the open index
+        title = self.viewer_notebook.tab(tab.viewer.frame, "text")
+        return self.open_viewer_tab(title, None if tab.stream is None else self.record_store.names["stream"][tab.stream])
+
+    def add_viewer_source(self, name: str):
+        # A remote (or any other) stream of records in its own tab. Returns feed(timestamp, level,
+        # message, module="", site=""), safe to call from any thread.
+        self.open_viewer_tab(name, name)
+
+        def feed(timestamp: float, level: str, message: str, module: str = "", site: str = ""):
+            # No log file behind these rows: evicted messages can't be read back
+            self.viewer_queue.put((timestamp, level, message, -1, None, module, site, name, None))
+        return feed
+
+    def close_viewer_tab(self, tab):
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.close_viewer_tab, tab)
+        if tab is self.viewer_tabs[0]:
+            return  # The live tab stays
+        self.viewer_tabs.remove(tab)
+        tab.close()
+        self.viewer_notebook.forget(tab.viewer.frame)
+        tab.viewer.frame.destroy()
+        self.on_viewer_tab_changed()
+
+    def on_viewer_tab_middle_click(self, event):
+        try:
+            position = self.viewer_notebook.index(f"@{event.x},{event.y}")
+        except tk.TclError:
+            return  # Not on a tab label
+        self.close_viewer_tab(self.viewer_tabs[position])
+
+    def on_viewer_tab_changed(self):
+        selected = self.viewer_notebook.select()
+        tab = next((tab for tab in self.viewer_tabs if str(tab.viewer.frame) == selected), self.viewer_tabs[0])
+        self.viewer_tab = tab
+        self.log_viewer = tab.viewer
+        shared = tab.store is self.record_store
+        if self.minimap is not None:
+            self.minimap.viewer = tab.viewer if shared else None
+        self.search_status.config(text="" if tab.progress is None else f"{tab.progress[0]} matches" + ("" if tab.progress[1] else "…"))
+        if not shared:
+            self.facet_panel.clear()
+        tab.viewer.refresh()
 
-        # Schedule the next update based on the selected speed
-        self.log_viewer_content.after(self.update_speed, self.update_log_viewer, message)
+    def update_log_viewer(self, message):
+        # Loguru sink, called on the logging thread: no Tk calls here, and the traceback snapshot is
+        # passed on as it is, to be rendered by drain_log_viewer
+        record = message.record
+        # Where the file sink has got to, so the record can be found again once it leaves the scrollback
+        try:
+            stat = os.stat(self.log_file)
+            offset, source = stat.st_size, (self.log_file, stat.st_ino)
+        except OSError:
+            offset, source = -1, None
+        site = f'{record["name"]}:{record["function"]}:{record["line"]}'
+        self.viewer_queue.put((record["time"].timestamp(), record["level"].name, record["message"], offset, source,
+                               record["name"], site, LIVE_STREAM, record["extra"].get("traceback")))
+
+    def drain_log_viewer(self):
+        batch = self.viewer_queue.take()
+        views = [tab.filter for tab in self.viewer_tabs if tab.filter is not None and tab.store is self.record_store]
+        for *fields, snapshot in batch:
+            if snapshot is not None:
+                fields[2] = f"{fields[2]}\n{snapshot}"  # Only records that reach the viewer are rendered
+            row = self.record_store.append(*fields)
+            for view in views:
+                view.add_live(self.record_store, row)  # New arrivals are filtered as they come in
+        dropped = self.viewer_queue.take_dropped()
+        if dropped:
+            self.record_store.append(time.time(), "WARNING", f"{dropped} records not shown: viewer queue full")
+        compacted = self.record_store.compact()
+        if compacted:
+            for tab in self.viewer_tabs:
+                if tab.store is self.record_store:
+                    tab.drop_rows(compacted)
+        tab = self.viewer_tab
+        view = tab.filter
+        if isinstance(view, FilterView) and (len(view), view.done) != tab.progress:
+            tab.progress = (len(view), view.done)
+            self.search_status.config(text=f"{len(view)} matches" + ("" if view.done else "…"))
+            self.log_viewer.refresh()  # Matches streaming in from the background scan
+        elif isinstance(view, TableView) and view.stale and (len(view), view.stale) != tab.progress:
+            tab.progress = (len(view), view.stale)
+            self.search_status.config(text=f"{len(view)} rows, {view.stale} newer not in this order: click a header to re-sort")
+        if (batch or dropped) and tab.store is self.record_store:
+            self.log_viewer.render()  # One redraw per frame however many records arrived; hidden tabs catch up when shown
+        if time.monotonic() - self.facets_refreshed >= FACET_REFRESH:
+            self.facets_refreshed = time.monotonic()
+            self.facet_panel.refresh()
+            if self.minimap is not None:
+                self.minimap.render()
+        elif self.minimap is not None:
+            self.minimap.render_window()
+        self.root.after(self.viewer_queue.interval, self.drain_log_viewer)
+
+    def open_log_file(self, path: str = None):
+        # Historical logs, rotated or compressed ones included, open in a tab at once; the line index
+        # is built in the background and the scrollbar refined as it goes. The file stays mapped
+        # rather than copied into the record store, once per file however many tabs show it.
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.open_log_file, path)
+        if path is None:
+            path = filedialog.askopenfilename(parent=self.root, initialdir=self.log_folder, title="Open log file")
+            if not path:
+                return
+        path = os.path.abspath(path)
+        entry = self.log_files.get(path)
+        if entry is None:
+            # First tab on this file: index it (decompressing first if needed) in the background
+            entry = self.log_files[path] = [LogFileStore(LogFileIndex(path)), 0]
+            entry[0].index.start_build()
+            self.root.after(INDEX_POLL, self.poll_log_file, entry[0])
+        entry[1] += 1
+        store = entry[0]
+        tab = self.open_viewer_tab(self.log_file_title(store.index), None, store)
+        tab.on_close = lambda: self.release_log_file(path)
+        tab.viewer.follow = False  # Start at the top of the file
+        return tab
+
+    def release_log_file(self, path: str):
+        entry = self.log_files[path]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self.log_files[path]
+            entry[0].index.close()
+
+    def log_file_title(self, index):
+        progress = index.progress()
+        name = os.path.basename(index.path)
+        return f"{name} ({progress})" if progress else name
+
+    def poll_log_file(self, store):
+        index = store.index
+        if index.closed:
+            return
+        done = index.done  # Before refreshing, so the last refresh sees the finished index
+        store.refresh()
+        title = self.log_file_title(index)
+        for tab in self.viewer_tabs:
+            if tab.store is store:
+                self.viewer_notebook.tab(tab.viewer.frame, text=title)
+                tab.viewer.refresh()
+        if not done:
+            self.root.after(INDEX_POLL, self.poll_log_file, store)
+
+    def on_search_changed(self):
+        # Wait for a pause in typing before starting a scan
+        if self.search_after is not None:
+            self.root.after_cancel(self.search_after)
+        self.search_after = self.root.after(SEARCH_DELAY, self.apply_search)
+
+    def apply_search(self):
+        self.search_after = None
+        level = self.search_level.get()
+        levels = LEVEL_ORDER[LEVEL_ORDER.index(level):] if level in LEVEL_ORDER else None
+        try:
+            self.filter_log_viewer(self.search_text.get(), self.search_regex.get(), levels)
+        except re.error as e:
+            self.search_status.config(text=f"Invalid pattern: {e}")
+
+    def filter_log_viewer(self, text: str = "", regex: bool = False, levels=None):
+        # Show only records of the current tab matching text (substring or regex) and levels. Existing
+        # rows are scanned in chunks on the tab's search worker; rows arriving meanwhile are checked in
+        # drain_log_viewer.
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.filter_log_viewer, text, regex, levels)
+        tab = self.viewer_tab
+        self.facet_panel.clear()
+        if not text and not levels:
+            tab.set_filter(None)
+            self.search_status.config(text="")
+            return
+        view = FilterView(Query(text, regex, levels, tab.stream), len(tab.store))
+        tab.set_filter(view)
+        tab.search_worker().start(view)
+
+    def show_facets(self, selection: dict):
+        # {facet: value id} from the facet panel, within the current tab's stream; replaces any search filter
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.show_facets, selection)
+        tab = self.viewer_tab
+        if tab.store is not self.record_store:
+            return  # Facets count the shared store's rows
+        self.search_text.set("")
+        self.search_status.config(text="")
+        if tab.stream is not None and selection:
+            selection = {**selection, "stream": tab.stream}
+        tab.set_filter(FacetView(self.record_store, selection) if selection else None)
+
+    def toggle_table(self):
+        # Table mode of the current tab: columns, sortable by clicking their headers
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.toggle_table)
+        tab = self.viewer_tab
+        if not hasattr(tab.viewer, "set_table") or not hasattr(tab.store, "table_text"):
+            return  # The text backend and log file tabs only have the list layout
+        tab.viewer.set_table(not tab.viewer.table)
+        if not tab.viewer.table and isinstance(tab.filter, TableView):
+            tab.set_filter(tab.filter.source)
+            self.search_status.config(text="")
+
+    def sort_log_viewer(self, column: str):
+        # Header click: sort by the column, or reverse the order when it already is
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.sort_log_viewer, column)
+        tab = self.viewer_tab
+        view = tab.filter if isinstance(tab.filter, TableView) else None
+        descending = view is not None and view.column == column and not view.descending
+        self.table_log_viewer(column, descending, ranges=view.ranges if view is not None else None)
+
+    def table_log_viewer(self, column: str = "time", descending: bool = False, start: float = None, end: float = None,
+                         min_level: str = None, ranges: dict = None):
+        # Order the current tab's rows (search or facet matches, if any) by time, level or source,
+        # keeping only those between start and end (timestamps) and at or above min_level. Both run
+        # over the store's array columns and index arrays, with NumPy when it is installed.
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.table_log_viewer, column, descending, start, end, min_level, ranges)
+        tab = self.viewer_tab
+        if not hasattr(tab.viewer, "set_table") or not hasattr(tab.store, "table_text"):
+            return
+        source = tab.filter.source if isinstance(tab.filter, TableView) else tab.filter
+        if source is not None and not source.done:
+            self.search_status.config(text="Search still running; sort again when it is done")
+            return
+        ranges = dict(ranges or {})
+        if start is not None or end is not None:
+            ranges["time"] = (start, end)
+        if min_level is not None:
+            ranges["level"] = (LEVEL_ORDER.index(min_level.upper()), None)
+        view = TableView(self.record_store, source if source is not None else tab.base(), column, descending, ranges)
+        tab.set_filter(view)
+        if not tab.viewer.table:
+            tab.viewer.set_table(True)
+        tab.viewer.set_sort_marker(column, descending)
+        tab.viewer.follow = view.follows
+        self.search_status.config(text=f"{len(view)} rows")
+        return view
 
     def add_stream_handler(self):
-        self.log_stream_handler = logger.add(sys.stderr, level=self.log_level.upper(), format=self.log_format)  # Use uppercase log level
+        if self.log_stream_handler is not None:
+            return  # Already added, e.g. by the constructor for "cli"
+        self.log_stream_handler = self.logger.add(sys.stderr, level=self.log_level.upper(), format=self.format_record)  # Use uppercase log level
 
     def set_update_speed(self, speed):
+        # Milliseconds between viewer ticks, keeping the current records-per-second budget
         self.update_speed = speed
+        self.viewer_queue.set_budget(1000 / speed, self.viewer_queue.rate)
 
     def copy_to_clipboard(self):
-        # Get the selected text or all the text in the log viewer
-        try:
-            selected_text = self.log_viewer_content.selection_get()
-        except:
-            selected_text = self.log_viewer_content.get("1.0", tk.END)
+        if not self.in_gui_thread():
+            return self.call_in_gui(self.copy_to_clipboard)
+        # Get the selected record or the visible rows of the log viewer
+        selected_text = self.log_viewer.selected_text()
 
         # Copy the text to the clipboard
         self.root.clipboard_clear()
         self.root.clipboard_append(selected_text)
         self.root.update() # Required to finalize the clipboard update
 
-    def on_canvas_configure(self, event):
-        self.log_viewer_canvas.itemconfig(self.log_viewer_content, width=event.width)
-
     def set_speed(self, speed):
-        if speed == "slow":
-            self.log_viewer_scrollbar.config(jump=0)
-        elif speed == "normal":
-            self.log_viewer_scrollbar.config(jump=0.5)
-        elif speed == "fast":
-            self.log_viewer_scrollbar.config(jump=1)
+        # "slow", "normal" or "fast": frames per second and records per second for the viewer
+        fps, rate = SPEEDS[speed]
+        self.viewer_queue.set_budget(fps, rate)
 
     def get_icon_name(self, level):
         icons = {
@@ -249,9 +839,9 @@ class UnifiedLogger:
         return styles.get(level, "primary")
 
     def get_line_height(self, text_label):
-        # Get the font size of the text label
-        #font_size = text_label.cget("font")[-1]
-        font_size = tkf.Font(font=text_label['font']).metrics('linespace')
+        # Get the font size of the text label; metrics are cached per font instead of building a Font per call
+        font = str(text_label['font'])
+        font_size = self.render_cache.font_metrics(font, lambda: tkf.Font(font=font))['linespace']
 
         return font_size
 
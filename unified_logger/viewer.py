@@ -0,0 +1,580 @@
+import tkinter as tk
+from bisect import bisect_left
+import tkinter.font as tkf
+from collections import deque
+from tkinter import Canvas, Scrollbar, Text, Label, Listbox
+from tkfontawesome import icon_to_image
+from .records import FACETS, TABLE_COLUMNS, FacetView
+from .search import ChunkCache, FilterView, SearchWorker
+
+
+ROW_PADDING = 4
+ICON_X = 4
+TEXT_X = 24
+WHEEL_ROWS = 3
+MAX_WRAP_CHARS = 4000
+
+# set_speed presets: (frames per second, records per second)
+SPEEDS = {"slow": (10, 200), "normal": (30, 2000), "fast": (60, 20000)}
+MAX_PENDING = 100000
+
+
+class IngestQueue:
+    # Hand-off from logging threads to the Tk thread. Producers only append to a deque (atomic, no Tk
+    # calls, never blocks); one Tk tick per frame takes at most `batch` records. When producers outrun
+    # the budget the oldest pending records are dropped and counted.
+    def __init__(self, max_pending: int = MAX_PENDING):
+        self.pending = deque(maxlen=max_pending)
+        self.dropped = 0
+        self.set_budget(*SPEEDS["normal"])
+
+    def set_budget(self, fps: float, rate: int):
+        self.fps = fps
+        self.rate = rate
+        self.interval = max(int(1000 / fps), 1)  # ms between ticks
+        self.batch = max(int(rate / fps), 1)
+
+    def put(self, item):
+        if len(self.pending) == self.pending.maxlen:
+            self.dropped += 1  # Approximate under contention; only reported
+        self.pending.append(item)
+
+    def take(self):
+        pending = self.pending
+        return [pending.popleft() for _ in range(min(self.batch, len(pending)))]
+
+    def take_dropped(self):
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class LogViewer:
+    # Virtualized list over a RecordStore. The canvas holds a fixed pool of (icon, text) items, one per
+    # visible line, and scrolling re-points them at other records, so the number of canvas items stays
+    # the same whether the store holds ten records or ten million. Icons, font metrics and, in wrap
+    # mode, wrapped row heights come from a RenderCache shared with the rest of the GUI.
+    def __init__(self, parent, store, colors, icon_name, boot_style, cache):
+        self.store = store
+        self.colors = colors
+        self.icon_name = icon_name  # level -> fontawesome icon name
+        self.boot_style = boot_style  # level -> theme color name
+        self.cache = cache
+        self.frame = tk.Frame(parent)
+        self.canvas = Canvas(self.frame, bg=colors.bg, highlightthickness=0)
+        self.scrollbar = Scrollbar(self.frame, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=tk.YES)
+        self.level_styles = {}  # level id -> (icon name, color)
+        self.pool = []  # [icon item, text item] per drawn line
+        self.highlight = self.canvas.create_rectangle(0, 0, 0, 0, fill=colors.selectbg, outline="", state=tk.HIDDEN)
+        # Off-screen rather than hidden: hidden items have no bbox to measure
+        self.measure_item = self.canvas.create_text(-10000, -10000, anchor=tk.NW)
+        self.wrap = False  # Show whole messages wrapped to the canvas width instead of one line per record
+        self.wrap_width = 800
+        self.table = False  # Time, level, source and message columns in a fixed-width font
+        self.on_sort = None  # column name -> None, called by the table header
+        self.header = tk.Frame(self.frame)
+        self.header_buttons = {}
+        tk.Frame(self.header, width=TEXT_X).pack(side=tk.LEFT)  # Over the icons
+        for name, width in TABLE_COLUMNS:
+            button = tk.Button(self.header, text=name.title(), font="TkFixedFont", anchor=tk.W, bd=1, padx=0,
+                               command=lambda name=name: self.on_sort and self.on_sort(name))
+            button.pack(side=tk.LEFT, fill=tk.X, expand=not width)
+            if width:
+                button.configure(width=width)
+            self.header_buttons[name] = button
+        self.rows = None  # store rows to show, e.g. a FilterView; None shows every row
+        self.first = 0  # position of the top visible row
+        self.last = 0  # one past the last drawn position
+        self.follow = True  # keep the newest record in view
+        self.selected = None  # store row
+        self.pending = None
+        self.set_font(tkf.nametofont("TkDefaultFont"))
+        self.canvas.bind("<Configure>", self.on_configure)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", lambda event: self.scroll_by(-WHEEL_ROWS))
+        self.canvas.bind("<Button-5>", lambda event: self.scroll_by(WHEEL_ROWS))
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<Prior>", lambda event: self.scroll_by(-self.page_size()))
+        self.canvas.bind("<Next>", lambda event: self.scroll_by(self.page_size()))
+        self.canvas.bind("<Home>", lambda event: self.scroll_to(0))
+        self.canvas.bind("<End>", lambda event: self.scroll_to(self.count()))
+
+    def count(self):
+        return len(self.store) if self.rows is None else len(self.rows)
+
+    def row_at(self, position: int):
+        return position if self.rows is None else self.rows[position]
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self.first = 0
+        self.follow = True
+        self.refresh()
+
+    def drop_rows(self, count: int, positions: int):
+        # The store dropped its oldest `count` rows, `positions` of which were in our list
+        self.first = max(self.first - positions, 0)
+        self.last = max(self.last - positions, 0)
+        if self.selected is not None:
+            self.selected = self.selected - count if self.selected >= count else None
+        self.refresh()
+
+    def set_font(self, font):
+        self.font = font
+        self.font_name = str(font)
+        self.cache.invalidate()  # Icon sizes and wrap heights depend on the font
+        self.row_height = self.cache.font_metrics(self.font_name, lambda: font)["linespace"] + ROW_PADDING
+        self.canvas.itemconfigure(self.measure_item, font=font)
+        for icon_item, text_item in self.pool:
+            self.canvas.itemconfigure(text_item, font=font)
+        self.refresh()
+
+    def set_wrap(self, wrap: bool):
+        self.wrap = wrap
+        self.refresh()
+
+    def set_table(self, table: bool):
+        self.table = table
+        if table:
+            self.header.pack(side=tk.TOP, fill=tk.X, before=self.scrollbar)
+        else:
+            self.header.pack_forget()
+        self.set_font(tkf.nametofont("TkFixedFont" if table else "TkDefaultFont"))
+
+    def set_sort_marker(self, column: str, descending: bool):
+        for name, button in self.header_buttons.items():
+            marker = (" ▼" if descending else " ▲") if name == column else ""
+            button.configure(text=name.title() + marker)
+
+    def apply_theme(self, colors):
+        # The cache itself is invalidated by the caller; only per-viewer state is reset here
+        self.colors = colors
+        self.level_styles.clear()
+        self.canvas.configure(bg=colors.bg)
+        self.canvas.itemconfigure(self.highlight, fill=colors.selectbg)
+        for icon_item, text_item in self.pool:
+            self.canvas.itemconfigure(text_item, fill=colors.fg)
+        self.refresh()
+
+    def page_size(self):
+        return max(self.canvas.winfo_height() // self.row_height, 1)
+
+    def refresh(self):
+        # Coalesce redraws: any number of appends between two idle callbacks cost one render
+        if self.pending is None:
+            self.pending = self.canvas.after_idle(self.render)
+
+    def line_text(self, row: int):
+        if self.wrap:
+            return self.store.text(row)[:MAX_WRAP_CHARS]
+        if self.table:
+            return self.store.table_text(row)
+        return self.store.row_text(row)
+
+    def line_height(self, text: str):
+        if not self.wrap:
+            return self.row_height
+        return self.cache.wrap_height(text, self.wrap_width, self.font_name, lambda: self.measure(text))
+
+    def measure(self, text: str):
+        self.canvas.itemconfigure(self.measure_item, text=text, width=self.wrap_width)
+        x1, y1, x2, y2 = self.canvas.bbox(self.measure_item)
+        return max(y2 - y1, self.row_height - ROW_PADDING) + ROW_PADDING
+
+    def last_page_start(self, total: int, height: int):
+        # First position of the page that ends with the newest record
+        if not self.wrap:
+            return max(total - height // self.row_height, 0)
+        position, used = total, 0
+        while position > 0:
+            used += self.line_height(self.line_text(self.row_at(position - 1)))
+            if used > height:
+                break
+            position -= 1
+        return min(position, max(total - 1, 0))
+
+    def render(self):
+        self.pending = None
+        total = self.count()
+        height = max(self.canvas.winfo_height(), 1)
+        if self.follow:
+            self.first = self.last_page_start(total, height)
+        self.first = max(min(self.first, total - 1), 0)
+        self.canvas.itemconfigure(self.highlight, state=tk.HIDDEN)
+        width = self.wrap_width if self.wrap else 0
+        drawn, y, position = 0, 0, self.first
+        while position < total and y < height:
+            if drawn == len(self.pool):
+                self.pool.append([self.canvas.create_image(ICON_X, 0, anchor=tk.W, state=tk.HIDDEN),
+                                  self.canvas.create_text(TEXT_X, 0, anchor=tk.NW, font=self.font, fill=self.colors.fg,
+                                                          state=tk.HIDDEN)])
+            icon_item, text_item = self.pool[drawn]
+            row = self.row_at(position)
+            text = self.line_text(row)
+            line_height = self.line_height(text)
+            self.canvas.coords(icon_item, ICON_X, y + self.row_height // 2)
+            self.canvas.itemconfigure(icon_item, image=self.icon(self.store.levels[row]), state=tk.NORMAL)
+            self.canvas.coords(text_item, TEXT_X, y + ROW_PADDING // 2)
+            self.canvas.itemconfigure(text_item, text=text, width=width, state=tk.NORMAL)
+            if row == self.selected:
+                self.canvas.coords(self.highlight, 0, y, self.canvas.winfo_width(), y + line_height)
+                self.canvas.itemconfigure(self.highlight, state=tk.NORMAL)
+            drawn, y, position = drawn + 1, y + line_height, position + 1
+        for icon_item, text_item in self.pool[drawn:]:
+            self.canvas.itemconfigure(icon_item, state=tk.HIDDEN)
+            self.canvas.itemconfigure(text_item, state=tk.HIDDEN)
+        self.last = position
+        if total:
+            self.scrollbar.set(self.first / total, self.last / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def icon(self, level: int):
+        style = self.level_styles.get(level)
+        if style is None:
+            name = self.store.level_names[level].lower()
+            style = self.level_styles[level] = (self.icon_name(name), self.colors.get(self.boot_style(name)))
+        return self.cache.image(style[0], style[1], self.row_height - ROW_PADDING, icon_to_image)
+
+    def scroll_to(self, first: int):
+        total = self.count()
+        last_page = self.last_page_start(total, max(self.canvas.winfo_height(), 1))
+        self.first = max(min(first, last_page), 0)
+        self.follow = self.first >= last_page  # Scrolling back to the bottom resumes following
+        self.refresh()
+
+    def scroll_by(self, rows: int):
+        self.scroll_to(self.first + rows)
+
+    def scroll_to_row(self, row: int):
+        # Store row -> position; row lists are in store order, so a filtered view is bisected. Sorted
+        # table views aren't, and find the row themselves.
+        if hasattr(self.rows, "position"):
+            self.scroll_to(self.rows.position(row))
+        else:
+            self.scroll_to(row if self.rows is None else bisect_left(self.rows, row))
+
+    def on_configure(self, event):
+        self.wrap_width = max(event.width - TEXT_X - ICON_X, 1)
+        self.refresh()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * self.count()))
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.page_size())
+        else:
+            self.scroll_by(int(amount))
+
+    def on_wheel(self, event):
+        self.scroll_by(-WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS)
+
+    def on_click(self, event):
+        self.canvas.focus_set()
+        # Rows can differ in height when wrapping, so find the clicked one from the drawn items
+        self.selected = None
+        for i, (icon_item, text_item) in enumerate(self.pool[:self.last - self.first]):
+            x1, y1, x2, y2 = self.canvas.bbox(text_item)
+            if event.y < y2 + ROW_PADDING // 2:
+                self.selected = self.row_at(self.first + i)
+                break
+        self.refresh()
+
+    def selected_text(self):
+        # The full selected record, or the drawn rows when nothing is selected
+        if self.selected is not None:
+            return self.store.text(self.selected)
+        return "\n".join(self.store.text(self.row_at(position)) for position in range(self.first, self.last))
+
+
+# Text glyphs standing in for the fontawesome icons of get_icon_name
+GLYPHS = {
+    "times-circle": "✖",
+    "exclamation-triangle": "⚠",
+    "info-circle": "ℹ",
+    "check-circle": "✔",
+    "cogs": "⚙",
+    "user": "☺",
+    "bug": "•",
+    "sitemap": "≡",
+    "shield-alt": "◆",
+}
+MAX_SCROLLBACK = 10000
+
+
+class TextLogViewer:
+    # Viewer backend on a single tk.Text: each batch of new records is one insert call with a level tag
+    # (glyph color) per record, and once the widget holds more than `scrollback` records the oldest are
+    # deleted from the head in one call. Native text selection makes copying work.
+    def __init__(self, parent, store, colors, icon_name, boot_style, cache, scrollback: int = MAX_SCROLLBACK):
+        self.store = store
+        self.colors = colors
+        self.icon_name = icon_name
+        self.boot_style = boot_style
+        self.cache = cache
+        self.scrollback = scrollback
+        self.frame = tk.Frame(parent)
+        self.text = Text(self.frame, bg=colors.bg, fg=colors.fg, wrap=tk.NONE, state=tk.DISABLED, highlightthickness=0)
+        self.scrollbar = Scrollbar(self.frame, command=self.text.yview)
+        self.text.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=tk.YES)
+        self.wrap = False
+        self.tagged = set()  # level ids with a configured tag
+        self.line_counts = deque()  # text lines per shown record, oldest first
+        self.rows = None  # store rows to show, e.g. a FilterView; None shows every row
+        self.shown = 0  # positions inserted so far
+        self.pending = None
+
+    def count(self):
+        return len(self.store) if self.rows is None else len(self.rows)
+
+    def row_at(self, position: int):
+        return position if self.rows is None else self.rows[position]
+
+    def set_rows(self, rows):
+        self.rows = rows
+        self.shown = 0
+        self.line_counts.clear()
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.configure(state=tk.DISABLED)
+        self.refresh()
+
+    def drop_rows(self, count: int, positions: int):
+        # Records already inserted stay in the widget; only the positions still to come move down
+        self.shown = max(self.shown - positions, 0)
+
+    def tag(self, level: int):
+        name = f"level{level}"
+        if level not in self.tagged:
+            level_name = self.store.level_names[level].lower()
+            self.text.tag_configure(name, foreground=self.colors.get(self.boot_style(level_name)))
+            self.tagged.add(level)
+        return name
+
+    def glyph(self, level: int):
+        return GLYPHS.get(self.icon_name(self.store.level_names[level].lower()), "·")
+
+    def refresh(self):
+        if self.pending is None:
+            self.pending = self.text.after_idle(self.render)
+
+    def render(self):
+        self.pending = None
+        if not getattr(self.rows, "done", True):
+            return  # Text only appends, so wait until a background search has filled in older matches
+        total = self.count()
+        if self.shown >= total:
+            return
+        positions = range(max(self.shown, total - self.scrollback), total)  # Rows that would be trimmed at once are skipped
+        at_bottom = self.text.yview()[1] >= 1.0
+        chunks = []
+        for position in positions:
+            row = self.row_at(position)
+            level = self.store.levels[row]
+            text = self.store.text(row)
+            chunks += [f"{self.glyph(level)} ", self.tag(level), text + "\n", ()]
+            self.line_counts.append(text.count("\n") + 1)
+        self.shown = total
+        self.text.configure(state=tk.NORMAL)
+        self.text.insert(tk.END, *chunks)
+        self.trim()
+        self.text.configure(state=tk.DISABLED)
+        if at_bottom:
+            self.text.see(tk.END)
+
+    def trim(self):
+        excess = len(self.line_counts) - self.scrollback
+        if excess <= 0:
+            return
+        lines = sum(self.line_counts.popleft() for _ in range(excess))
+        self.text.delete("1.0", f"{lines + 1}.0")
+
+    def set_font(self, font):
+        self.text.configure(font=font)
+
+    def set_wrap(self, wrap: bool):
+        self.wrap = wrap
+        self.text.configure(wrap=tk.WORD if wrap else tk.NONE)
+
+    def apply_theme(self, colors):
+        self.colors = colors
+        self.text.configure(bg=colors.bg, fg=colors.fg)
+        for level in self.tagged:
+            level_name = self.store.level_names[level].lower()
+            self.text.tag_configure(f"level{level}", foreground=colors.get(self.boot_style(level_name)))
+
+    def scroll_to(self, position: int):
+        # Position -> text line, counting only the records still in the widget
+        first_shown = self.shown - len(self.line_counts)
+        line = 1 + sum(count for count, _ in zip(self.line_counts, range(max(position - first_shown, 0))))
+        self.text.see(f"{line}.0")
+
+    def scroll_to_row(self, row: int):
+        self.scroll_to(row if self.rows is None else bisect_left(self.rows, row))
+
+    def selected_text(self):
+        try:
+            return self.text.get(tk.SEL_FIRST, tk.SEL_LAST)
+        except tk.TclError:  # Nothing selected
+            return self.text.get("1.0", tk.END)
+
+
+FACET_TITLES = {"level": "Levels", "module": "Modules", "site": "Call sites", "stream": "Streams"}
+
+
+class FacetPanel:
+    # A Listbox per facet listing "name (count)". Counts are the lengths of the store's row lists, so a
+    # refresh costs one comparison per value and only rewrites the entries whose count changed.
+    def __init__(self, parent, store, on_select):
+        self.store = store
+        self.on_select = on_select  # called with {facet: value id}
+        self.frame = tk.Frame(parent)
+        self.listboxes = {}
+        self.shown = {facet: [] for facet in FACETS}  # displayed count per value id
+        for facet in FACETS:
+            Label(self.frame, text=FACET_TITLES[facet], anchor=tk.W).pack(fill=tk.X)
+            listbox = Listbox(self.frame, exportselection=False, height=8, width=32)
+            listbox.pack(fill=tk.BOTH, expand=tk.YES)
+            listbox.insert(tk.END, "All")
+            listbox.bind("<<ListboxSelect>>", lambda event: self.on_select(self.selection()))
+            self.listboxes[facet] = listbox
+
+    def refresh(self):
+        for facet, listbox in self.listboxes.items():
+            shown = self.shown[facet]
+            selected = listbox.curselection()
+            for value, rows in enumerate(self.store.postings[facet]):
+                count = len(rows)
+                if value < len(shown) and shown[value] == count:
+                    continue
+                text = f"{self.store.names[facet][value] or '?'} ({count})"
+                if value < len(shown):
+                    listbox.delete(value + 1)
+                    listbox.insert(value + 1, text)
+                    if value + 1 in selected:
+                        listbox.selection_set(value + 1)
+                    shown[value] = count
+                else:
+                    listbox.insert(tk.END, text)
+                    shown.append(count)
+
+    def selection(self):
+        selection = {}
+        for facet, listbox in self.listboxes.items():
+            selected = listbox.curselection()
+            if selected and selected[0] > 0:  # Entry 0 is "All"
+                selection[facet] = selected[0] - 1
+        return selection
+
+    def clear(self):
+        for listbox in self.listboxes.values():
+            listbox.selection_clear(0, tk.END)
+
+
+MINIMAP_WIDTH = 40
+MINIMAP_SLOT = 3  # pixels per time slice
+
+
+class Minimap:
+    # Record and error density over the whole session, one bar pair per time slice, drawn from the
+    # store's per-second totals with a fixed pool of rectangles. Clicking jumps the viewer to that time.
+    def __init__(self, parent, store, viewer, colors):
+        self.store = store
+        self.viewer = viewer
+        self.colors = colors
+        self.canvas = Canvas(parent, width=MINIMAP_WIDTH, bg=colors.bg, highlightthickness=0, cursor="hand2")
+        self.bars = []  # [records item, errors item] per slice
+        self.window = self.canvas.create_rectangle(0, 0, 0, 0, outline=colors.fg)
+        self.span = (0.0, 1.0)
+        self.canvas.bind("<Configure>", lambda event: self.render())
+        self.canvas.bind("<Button-1>", self.on_click)
+        self.canvas.bind("<B1-Motion>", self.on_click)
+
+    def render(self):
+        store = self.store
+        height = max(self.canvas.winfo_height(), 1)
+        slots = max(height // MINIMAP_SLOT, 1)
+        if not store.seconds:
+            return
+        self.span = (store.seconds[0], store.seconds[-1] + 1)
+        density = store.density(self.span[0], self.span[1], slots)
+        peak = max(max(count for count, _ in density), 1)
+        while len(self.bars) < slots:
+            self.bars.append([self.canvas.create_rectangle(0, 0, 0, 0, fill=self.colors.info, outline=""),
+                              self.canvas.create_rectangle(0, 0, 0, 0, fill=self.colors.danger, outline="")])
+        for slot, (records_item, errors_item) in enumerate(self.bars):
+            count, errors = density[slot] if slot < slots else (0, 0)
+            y = slot * MINIMAP_SLOT
+            self.canvas.coords(records_item, 0, y, MINIMAP_WIDTH * count / peak, y + MINIMAP_SLOT - 1)
+            self.canvas.coords(errors_item, 0, y, MINIMAP_WIDTH * errors / peak, y + MINIMAP_SLOT - 1)
+        self.render_window()
+
+    def render_window(self):
+        # Outline the time range the viewer currently shows
+        viewer, store = self.viewer, self.store
+        if viewer is None or not store.seconds or viewer.last <= viewer.first:
+            return
+        start, end = self.span
+        height = max(self.canvas.winfo_height(), 1)
+        top = (store.times[viewer.row_at(viewer.first)] - start) / (end - start) * height
+        bottom = (store.times[viewer.row_at(viewer.last - 1)] - start) / (end - start) * height
+        self.canvas.coords(self.window, 0, top, MINIMAP_WIDTH - 1, max(bottom, top + 2))
+        self.canvas.tag_raise(self.window)
+
+    def on_click(self, event):
+        if self.viewer is None:
+            return
+        start, end = self.span
+        fraction = min(max(event.y / max(self.canvas.winfo_height(), 1), 0.0), 1.0)
+        self.viewer.scroll_to_row(self.store.row_at_time(start + fraction * (end - start)))
+
+
+class ViewerTab:
+    # A notebook page: a viewer over a store, optionally limited to one stream of the shared
+    # RecordStore, with the search or facet filter applied in it. A tab holds row index arrays only;
+    # a stream's own row list is the store's, so a second tab on the same stream copies nothing.
+    def __init__(self, viewer, store, stream: int = None):
+        self.viewer = viewer
+        self.store = store
+        self.stream = stream  # stream value id, None for every row of the store
+        self.filter = None  # FilterView or FacetView
+        self.progress = None  # (matches, done) last shown in the status line
+        self.worker = None
+        self.on_close = None
+
+    def base(self):
+        return None if self.stream is None else FacetView(self.store, {"stream": self.stream})
+
+    def search_worker(self):
+        if self.worker is None:
+            self.worker = SearchWorker(self.store)
+        return self.worker
+
+    def set_filter(self, view):
+        if self.worker is not None and view is not self.worker.view:
+            self.worker.cancel()
+        self.filter = view
+        self.progress = None
+        self.viewer.set_rows(view if view is not None else self.base())
+
+    def drop_rows(self, count: int):
+        # The store dropped its oldest `count` rows and renumbered the rest (RecordStore.compact)
+        if self.worker is not None:
+            self.worker.cache = ChunkCache()  # Chunks of the old numbering; a scan in progress keeps the old cache
+        rows = self.viewer.rows
+        if isinstance(rows, FilterView) and not rows.done:
+            view = FilterView(rows.query, len(self.store))  # Scan again over the new numbering
+            self.set_filter(view)
+            self.worker.start(view)
+            return
+        positions = count if rows is None else rows.drop(self.store, count)
+        self.viewer.drop_rows(count, positions)
+
+    def close(self):
+        if self.worker is not None:
+            self.worker.cancel()
+        if self.on_close is not None:
+            self.on_close()